@@ -1,12 +1,29 @@
+import importlib
+
 import streamlit as st
-import json
-import os
 
-# Import setup and game modules
-from setup.family_setup import family_setup_screen
-from games.meet_my_family import meet_my_family_screen
-from games.find_my_family import find_my_family_screen
-from games.who_is_speaking import who_is_speaking_screen
+from utils.family_repository import load_family_data
+from utils.households import DEFAULT_HOUSEHOLD, current_household, get_household
+from utils.instrumentation import rerun, span
+from utils.integrity import ensure_checked
+
+# --------------------------------------------------
+# Route Registry
+# --------------------------------------------------
+# Each page names the module and entry point that draws it. A page's
+# module (and whatever it imports, e.g. PIL for the maze) is loaded the
+# first time that page is visited, not at startup.
+ROUTES = {
+    "setup": "setup.family_setup:family_setup_screen",
+    "meet_my_family": "games.meet_my_family:meet_my_family_screen",
+    "find_my_family": "games.find_my_family:find_my_family_screen",
+    "who_is_speaking": "games.who_is_speaking:who_is_speaking_screen",
+}
+
+
+def load_screen(page_name):
+    module_name, _, entry_point = ROUTES[page_name].partition(":")
+    return getattr(importlib.import_module(module_name), entry_point)
 
 # --------------------------------------------------
 # Page Configuration
@@ -16,24 +33,32 @@ st.set_page_config(
     layout="wide"
 )
 
-DATA_FILE = "data/family_data.json"
-
 # --------------------------------------------------
 # Session State Initialization
 # --------------------------------------------------
 if "page" not in st.session_state:
     st.session_state.page = "setup"
 
+# Bind this session to one household (?household=<id>, else the default)
+if "household_id" not in st.session_state:
+    household_id = st.query_params.get("household", DEFAULT_HOUSEHOLD)
+    try:
+        # Links only open households that exist; opening one never creates it
+        get_household(household_id)
+    except (ValueError, KeyError):
+        st.error("Invalid household link. Please check the address.")
+        st.stop()
+    st.session_state.household_id = household_id
+
+# Missing media is found off the request path, a few minutes at a time
+ensure_checked(current_household())
+
 # --------------------------------------------------
 # Helper: Check if family data exists
 # --------------------------------------------------
 def is_setup_complete():
-    if not os.path.exists(DATA_FILE):
-        return False
     try:
-        with open(DATA_FILE, "r") as f:
-            data = json.load(f)
-        return len(data) > 0
+        return len(load_family_data()) > 0
     except:
         return False
 
@@ -84,23 +109,28 @@ def home_screen():
             return
 
 # --------------------------------------------------
-# MAIN APP FLOW
+# Screen Helper: time each screen as one span
 # --------------------------------------------------
-if st.session_state.page == "setup":
-    family_setup_screen(go_to)
+def show(screen, *args):
+    with span("screen"):
+        screen(*args)
 
-elif not is_setup_complete():
-    st.session_state.page = "setup"
-    st.rerun()
+# --------------------------------------------------
+# MAIN APP FLOW
+# --------------------------------------------------
+with rerun(st.session_state.page):
+    with span("route"):
+        ready = st.session_state.page == "setup" or is_setup_complete()
 
-elif st.session_state.page == "home":
-    home_screen()
+    if st.session_state.page == "setup":
+        show(load_screen("setup"), go_to)
 
-elif st.session_state.page == "meet_my_family":
-    meet_my_family_screen(go_to)
+    elif not ready:
+        st.session_state.page = "setup"
+        st.rerun()
 
-elif st.session_state.page == "find_my_family":
-    find_my_family_screen(go_to)
+    elif st.session_state.page == "home":
+        show(home_screen)
 
-elif st.session_state.page == "who_is_speaking":
-    who_is_speaking_screen(go_to)
+    elif st.session_state.page in ROUTES:
+        show(load_screen(st.session_state.page), go_to)
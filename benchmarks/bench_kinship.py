@@ -0,0 +1,99 @@
+"""Kinship graph benchmark.
+
+Builds a synthetic family tree (couples with children over several
+generations), then times the full build, an incremental update after one
+edit, and kinship lookups.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_kinship [members] [repeats]
+"""
+import random
+import sys
+import time
+
+from utils.kinship import KinshipGraph
+from utils.member_store import MemberStore
+
+
+def _time(fn, repeats):
+    timings = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[-1]
+
+
+def family_tree(size, seed=0):
+    """``size`` members: couples whose children marry in from outside."""
+    rng = random.Random(seed)
+    members = []
+
+    def person(parents=()):
+        member = {
+            "id": len(members) + 1,
+            "name": f"Person {len(members) + 1}",
+            "relationship": "Relative",
+            "gender": rng.choice(("female", "male")),
+            "parents": list(parents),
+        }
+        members.append(member)
+        return member
+
+    couples = []
+    first, second = person(), person()
+    first["spouses"] = [second["id"]]
+    couples.append((first["id"], second["id"]))
+    while len(members) < size:
+        parents = couples.pop(0) if len(couples) > 1 else couples[0]
+        for _ in range(rng.randint(1, 4)):
+            if len(members) >= size - 1:
+                break
+            child = person(parents)
+            spouse = person()
+            child["spouses"] = [spouse["id"]]
+            couples.append((child["id"], spouse["id"]))
+    return members
+
+
+def main(size=5000, repeats=5):
+    members = family_tree(size)
+    family = MemberStore(members)
+
+    build_median, build_max = _time(lambda i: KinshipGraph(family), repeats)
+    graph = KinshipGraph(family)
+
+    # One edit: a new baby for the last couple
+    last = members[-1]
+    edited = MemberStore(members + [{
+        "id": size + 1, "name": "Baby", "relationship": "Relative",
+        "parents": [last["id"]],
+    }])
+    update_median, update_max = _time(lambda i: graph.updated(edited), repeats)
+    recomputed = graph.updated(edited).recomputed
+
+    ids = list(family.ids)
+    rng = random.Random(1)
+    queries = [(rng.choice(ids), rng.choice(("cousin", "aunt", "grandmother")))
+               for _ in range(10000)]
+    t0 = time.perf_counter()
+    for member_id, word in queries:
+        graph.relatives(member_id, word)
+    lookup_us = (time.perf_counter() - t0) * 1e6 / len(queries)
+
+    t0 = time.perf_counter()
+    for member_id, _ in queries:
+        graph.follow(member_id, ("mother", "brother"))
+    follow_us = (time.perf_counter() - t0) * 1e6 / len(queries)
+
+    print(f"family tree of {len(members)} members")
+    print(f"  full build                 median {build_median:8.1f} ms  max {build_max:8.1f} ms")
+    print(f"  update after one edit      median {update_median:8.1f} ms  max {update_max:8.1f} ms  ({recomputed} recomputed)")
+    print(f"  relatives(id, word)        mean   {lookup_us:8.2f} us")
+    print(f"  mother's brother           mean   {follow_us:8.2f} us")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
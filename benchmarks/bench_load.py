@@ -0,0 +1,543 @@
+"""Concurrent-session load test against a local ``streamlit run app.py``.
+
+Starts the app on a free port with a synthetic household, then drives N
+concurrent websocket sessions (speaking the browser's protocol) through a
+scripted journey: setup, then each game's start, moves and answers. For
+each N it reports rerun latency percentiles, throughput and server memory
+per session, and writes a JSON report for later runs to compare against.
+
+Every N gets a fresh server, warmed up by one session; server memory per
+session is the growth in RSS from there while all N sessions are
+connected (noisy for small N, where the allocator's slack dominates).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_load
+    python -m benchmarks.bench_load --sessions 1,10,50 --family 100
+    python -m benchmarks.bench_load --compare benchmarks/reports/<earlier>.json
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "reports")
+
+# Synthetic data lives in a throwaway data root, shared with the server
+if "KMF_DATA_DIR" not in os.environ:
+    os.environ["KMF_DATA_DIR"] = tempfile.mkdtemp(prefix="kmf-bench-")
+    atexit.register(shutil.rmtree, os.environ["KMF_DATA_DIR"], True)
+sys.path.insert(0, REPO_ROOT)
+
+import streamlit  # noqa: E402
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+from websockets.asyncio.client import connect  # noqa: E402
+
+from benchmarks.bench_screens import build_household  # noqa: E402
+
+SESSION_COUNTS = (1, 5, 10, 25)
+
+# Seconds a simulated child waits between taps (randomised +-50%)
+THINK_SECONDS = 0.25
+
+# Moves made in Find My Family, each preceded by a hint
+MOVES = 6
+
+# A level whose p95 rerun exceeds this (or that has errors) is past the limit
+SLO_P95_MS = 1000
+
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 60
+
+# A metric regresses when it exceeds the earlier report's value * tolerance;
+# throughput regresses when it falls below the earlier value / tolerance
+TOLERANCE = {"p50_ms": 1.5, "p95_ms": 1.5, "p99_ms": 1.5, "rss_per_session_kb": 1.25}
+THROUGHPUT_TOLERANCE = 1.5
+
+FINISHED = (
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+)
+
+
+# --------------------------------------------------
+# Server under test
+# --------------------------------------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """``streamlit run app.py`` in a child process."""
+
+    def __init__(self):
+        self.port = _free_port()
+        self.log = tempfile.TemporaryFile(mode="w+")
+        # Media goes through Streamlit so runs do not race for the media port
+        env = dict(os.environ, KMF_MEDIA_PORT="0")
+        self.proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run",
+                os.path.join(REPO_ROOT, "app.py"),
+                "--server.port", str(self.port),
+                "--server.address", "127.0.0.1",
+                "--server.headless", "true",
+                "--server.fileWatcherType", "none",
+                "--browser.gatherUsageStats", "false",
+            ],
+            cwd=REPO_ROOT, env=env,
+            stdout=subprocess.DEVNULL, stderr=self.log,
+        )
+        self._wait_ready()
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def _wait_ready(self):
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        health = f"http://127.0.0.1:{self.port}/_stcore/health"
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                break
+            try:
+                with urllib.request.urlopen(health, timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Server did not start:\n{self.log_tail()}")
+
+    def log_tail(self, lines=20):
+        self.log.seek(0)
+        return "".join(self.log.readlines()[-lines:])
+
+    def rss_kb(self):
+        """Resident memory of the server process, or None off Linux."""
+        try:
+            with open(f"/proc/{self.proc.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return None
+
+    def stop(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+
+# --------------------------------------------------
+# One browser-like session
+# --------------------------------------------------
+class JourneyError(Exception):
+    pass
+
+
+class Session:
+    """Sends reruns the way the browser does and waits for each to finish.
+
+    After every rerun, ``buttons``, ``radios`` and ``alerts`` describe the
+    page that run drew.
+    """
+
+    def __init__(self, url, query_string, think):
+        self.url = url
+        self.query_string = query_string
+        self.think = think
+        self.page_hash = ""
+        self.ws = None
+        self.timings = []     # (step, ms)
+        self.errors = []
+        self.buttons, self.radios, self.alerts = [], [], []
+
+    async def open(self):
+        self.ws = await connect(
+            self.url, subprotocols=["streamlit"], max_size=None,
+            open_timeout=RERUN_TIMEOUT,
+        )
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    # ----------------------------------------------
+    # Protocol
+    # ----------------------------------------------
+    async def rerun(self, step, widgets=()):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = self.query_string
+        state.page_script_hash = self.page_hash
+        state.widget_states.widgets.extend(widgets)
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await asyncio.wait_for(self._until_finished(), RERUN_TIMEOUT)
+        self.timings.append((step, (time.perf_counter() - start) * 1000))
+
+    async def _until_finished(self):
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                # Every script run starts over; st.rerun() starts another
+                self.page_hash = msg.new_session.page_script_hash
+                self.buttons, self.radios, self.alerts = [], [], []
+            elif kind == "delta":
+                self._on_delta(msg.delta)
+            elif kind == "script_finished":
+                if msg.script_finished in FINISHED:
+                    return
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise JourneyError("app.py failed to compile")
+
+    def _on_delta(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "button":
+            self.buttons.append(element.button)
+        elif kind == "radio":
+            self.radios.append(element.radio)
+        elif kind == "alert":
+            self.alerts.append(element.alert.body)
+        elif kind == "exception":
+            self.errors.append(element.exception.message)
+
+    # ----------------------------------------------
+    # Taps
+    # ----------------------------------------------
+    @staticmethod
+    def _key(widget):
+        # Widget IDs end with the widget's key: "$$ID-<hash>-<key>"
+        return widget.id.split("-", 2)[-1]
+
+    def keys(self, prefix):
+        return [self._key(b) for b in self.buttons if self._key(b).startswith(prefix)]
+
+    def _button(self, label=None, key=None):
+        for button in self.buttons:
+            if (label is not None and button.label == label) or (
+                key is not None and self._key(button) == key
+            ):
+                return button
+        raise JourneyError(f"No button {label or key!r} on the page")
+
+    def choice(self, label, option):
+        """Widget state selecting ``option`` in the radio called ``label``."""
+        for radio in self.radios:
+            if radio.label == label and option in radio.options:
+                # Radios send the chosen option's label
+                return WidgetState(id=radio.id, string_value=option)
+        raise JourneyError(f"No radio {label!r} on the page")
+
+    async def click(self, step, label=None, key=None, widgets=()):
+        button = self._button(label, key)
+        if self.think:
+            await asyncio.sleep(self.think * random.uniform(0.5, 1.5))
+        await self.rerun(step, [WidgetState(id=button.id, trigger_value=True), *widgets])
+
+
+# --------------------------------------------------
+# Scripted journey: setup, then every game
+# --------------------------------------------------
+async def journey(session, moves):
+    await session.rerun("open")
+    await session.click("setup:home", label="⬅ Back to Home")
+
+    # Meet My Family: match every name of one round to its photo
+    await session.click("meet:open", key="meet_family")
+    await session.click("meet:start", label="▶ Start Game")
+    for key in session.keys("name_"):
+        member_id = key.split("_", 1)[1]
+        await session.click("meet:name", key=key)
+        await session.click("meet:answer", key=f"photo_{member_id}")
+    await session.click("meet:home", label="⬅ Back to Home")
+
+    # Find My Family with big buttons, following the hints
+    await session.click("find:open", key="find_family")
+    await session.click(
+        "find:start", label="▶ Start Game",
+        widgets=[session.choice("Controls", "Big buttons")],
+    )
+    for _ in range(moves):
+        await session.click("find:hint", label="💡 Hint")
+        # The alert's leading emoji becomes its icon: "Try ⬅ Left"
+        hint = next((a for a in session.alerts if a.startswith("Try ")), None)
+        if hint is None:
+            break   # at the goal
+        await session.click("find:move", label=hint[len("Try "):])
+    await session.click("find:home", label="⬅ Back to Home")
+
+    # Who Is Speaking: two rounds of answers (Play Again returns to the intro)
+    await session.click("speak:open", key="who_speaking")
+    for _ in range(2):
+        await session.click("speak:start", label="▶ Start Game")
+        await session.click("speak:answer", key=session.keys("choose_")[0])
+        await session.click("speak:again", label="🔁 Play Again")
+    await session.click("speak:home", label="⬅ Back to Home")
+
+
+class _Finished:
+    """Counts sessions done with their journey; holds them connected."""
+
+    def __init__(self, total):
+        self.remaining = total
+        self.all_done = asyncio.Event()
+        self.hold = asyncio.Event()
+
+    def release(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.all_done.set()
+
+
+async def _run_session(server, query_string, args, delay, finished):
+    await asyncio.sleep(delay)
+    session = Session(server.url, query_string, args.think)
+    try:
+        await session.open()
+        await journey(session, args.moves)
+    except Exception as exc:
+        # A failed journey is reported, not fatal: that is what overload does
+        session.errors.append(f"{type(exc).__name__}: {exc}")
+    finally:
+        finished.release()
+    # Stay connected until memory has been measured
+    await finished.hold.wait()
+    await session.close()
+    return session
+
+
+async def _sample_rss(server, peak, stop):
+    while not stop.is_set():
+        rss = server.rss_kb()
+        if rss is not None:
+            peak[0] = max(peak[0], rss)
+        await asyncio.sleep(0.1)
+
+
+async def _level(server, query_string, sessions, args):
+    finished = _Finished(sessions)
+    peak, stop = [server.rss_kb() or 0], asyncio.Event()
+    sampler = asyncio.create_task(_sample_rss(server, peak, stop))
+
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(_run_session(
+            server, query_string, args, args.ramp * i / sessions, finished,
+        ))
+        for i in range(sessions)
+    ]
+    await finished.all_done.wait()
+    elapsed = time.perf_counter() - start
+
+    connected_rss = server.rss_kb()
+    finished.hold.set()
+    results = await asyncio.gather(*tasks)
+    stop.set()
+    await sampler
+    return results, elapsed, connected_rss, peak[0]
+
+
+# --------------------------------------------------
+# Statistics
+# --------------------------------------------------
+def _percentile(values, q):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * q // 100))
+    return round(values[int(rank) - 1], 1)
+
+
+def _summary(timings):
+    values = sorted(timings)
+    return {
+        "count": len(values),
+        "p50_ms": _percentile(values, 50),
+        "p95_ms": _percentile(values, 95),
+        "p99_ms": _percentile(values, 99),
+        "max_ms": round(values[-1], 1) if values else None,
+    }
+
+
+def run_level(query_string, sessions, args):
+    server = Server()
+    try:
+        # One warm-up journey loads the pages' modules and media caches
+        warmup, _, _, _ = asyncio.run(_level(server, query_string, 1, args))
+        if warmup[0].errors:
+            raise RuntimeError(
+                f"Warm-up session failed: {warmup[0].errors[0]}\n{server.log_tail()}"
+            )
+        idle_rss = server.rss_kb()
+        results, elapsed, connected_rss, peak_rss = asyncio.run(
+            _level(server, query_string, sessions, args)
+        )
+    finally:
+        server.stop()
+
+    timings = [ms for s in results for _, ms in s.timings]
+    steps = {}
+    for s in results:
+        for step, ms in s.timings:
+            steps.setdefault(step, []).append(ms)
+
+    level = {"sessions": sessions, "seconds": round(elapsed, 2)}
+    level.update({k: v for k, v in _summary(timings).items() if k != "count"})
+    level.update({
+        "reruns": len(timings),
+        "throughput_rps": round(len(timings) / elapsed, 2) if elapsed else None,
+        "failed_sessions": sum(1 for s in results if s.errors),
+        "errors": sorted({e for s in results for e in s.errors})[:10],
+        "rss_idle_kb": idle_rss,
+        "rss_connected_kb": connected_rss,
+        "rss_peak_kb": peak_rss or None,
+        "rss_per_session_kb": (
+            round((connected_rss - idle_rss) / sessions, 1)
+            if idle_rss is not None and connected_rss is not None else None
+        ),
+        "steps": {step: _summary(values) for step, values in sorted(steps.items())},
+    })
+    return level
+
+
+# --------------------------------------------------
+# Reports
+# --------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(levels, earlier):
+    regressions = []
+    before = {level["sessions"]: level for level in earlier.get("levels", ())}
+    for level in levels:
+        base = before.get(level["sessions"])
+        if not base:
+            continue
+        key = f"{level['sessions']} sessions"
+        for metric, limit in TOLERANCE.items():
+            if level.get(metric) and base.get(metric) and base[metric] > 0:
+                ratio = level[metric] / base[metric]
+                if ratio > limit:
+                    regressions.append(
+                        f"{key} {metric}: {level[metric]} vs "
+                        f"earlier {base[metric]} ({ratio:.2f}x)"
+                    )
+        if level.get("throughput_rps") and base.get("throughput_rps"):
+            ratio = base["throughput_rps"] / level["throughput_rps"]
+            if ratio > THROUGHPUT_TOLERANCE:
+                regressions.append(
+                    f"{key} throughput_rps: {level['throughput_rps']} vs "
+                    f"earlier {base['throughput_rps']} ({ratio:.2f}x slower)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions", default=",".join(map(str, SESSION_COUNTS)),
+        help="comma-separated numbers of concurrent sessions",
+    )
+    parser.add_argument("--family", type=int, default=10, help="family size")
+    parser.add_argument("--think", type=float, default=THINK_SECONDS)
+    parser.add_argument("--moves", type=int, default=MOVES)
+    parser.add_argument(
+        "--ramp", type=float, default=1.0,
+        help="seconds over which sessions connect",
+    )
+    parser.add_argument("--slo-ms", type=float, default=SLO_P95_MS)
+    parser.add_argument("--report", help="report path (default: benchmarks/reports/)")
+    parser.add_argument("--compare", help="an earlier report to compare with")
+    args = parser.parse_args(argv)
+
+    household = build_household(args.family, "small")
+    query_string = f"household={household.id}"
+
+    levels = []
+    limit = None
+    for sessions in map(int, args.sessions.split(",")):
+        level = run_level(query_string, sessions, args)
+        levels.append(level)
+        print(
+            f"{sessions:4d} sessions  p50 {level['p50_ms']:8.1f} ms  "
+            f"p95 {level['p95_ms']:8.1f} ms  p99 {level['p99_ms']:8.1f} ms  "
+            f"{level['throughput_rps']:7.1f} reruns/s  "
+            f"{level['rss_per_session_kb']} KB/session  "
+            f"{level['failed_sessions']} failed",
+            flush=True,
+        )
+        if limit is None and (level["failed_sessions"] or level["p95_ms"] > args.slo_ms):
+            limit = sessions
+
+    report = {
+        "version": 1,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "cpus": os.cpu_count(),
+        "params": {
+            "family": args.family, "think_seconds": args.think,
+            "moves": args.moves, "ramp_seconds": args.ramp, "slo_p95_ms": args.slo_ms,
+        },
+        # First session count past the SLO, None if every level met it
+        "limit_sessions": limit,
+        "levels": levels,
+    }
+    path = args.report or os.path.join(
+        REPORTS_DIR, time.strftime("load-%Y%m%d-%H%M%S.json")
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Report written to {path}")
+    if limit is not None:
+        print(f"p95 above {args.slo_ms:g} ms or failures from {limit} sessions")
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        regressions = compare(levels, json.load(f))
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print("OK" if not regressions else f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
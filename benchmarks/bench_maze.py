@@ -0,0 +1,44 @@
+"""Maze engine benchmark.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_maze [rows] [cols] [repeats]
+"""
+import sys
+import time
+
+from games.maze import generate_maze
+
+
+def _time(fn, repeats):
+    timings = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[-1]
+
+
+def main(rows=200, cols=200, repeats=20):
+    # Uncached generation (fresh seed every time) includes the distance field
+    gen_median, gen_max = _time(
+        lambda i: generate_maze.__wrapped__(rows, cols, i), repeats
+    )
+
+    maze = generate_maze(rows, cols, 0)
+    path_median, path_max = _time(
+        lambda i: maze.shortest_path(maze.start), repeats
+    )
+    hint_median, _ = _time(lambda i: maze.hint(maze.start), repeats * 50)
+    cached_median, _ = _time(lambda i: generate_maze(rows, cols, 0), repeats)
+
+    print(f"maze {rows}x{cols} cells, grid {maze.shape[0]}x{maze.shape[1]}")
+    print(f"  generate + distance field  median {gen_median:8.3f} ms  max {gen_max:8.3f} ms")
+    print(f"  shortest path ({maze.distance(maze.start)} steps)  median {path_median:8.3f} ms  max {path_max:8.3f} ms")
+    print(f"  hint (one move)            median {hint_median * 1000:8.3f} us")
+    print(f"  cached lookup by seed      median {cached_median * 1000:8.3f} us")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,289 @@
+"""Headless per-screen benchmark.
+
+Drives every screen of app.py through streamlit's AppTest with synthetic
+families and media, and compares the results with a stored baseline.
+
+Timings are machine-specific: record a baseline on the machine that will
+run the comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_screens                    # compare
+    python -m benchmarks.bench_screens --update-baseline  # record
+    python -m benchmarks.bench_screens --sizes 10,100 --media small
+"""
+import argparse
+import atexit
+import io
+import json
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(REPO_ROOT, "benchmarks", "baseline_screens.json")
+
+# Synthetic data lives in a throwaway data root
+def _remove_data_root(path):
+    shutil.rmtree(path, True)
+    # Drop the static-serving links left pointing at the removed media
+    from utils.media_server import sweep_static
+    sweep_static()
+
+
+if "KMF_DATA_DIR" not in os.environ:
+    os.environ["KMF_DATA_DIR"] = tempfile.mkdtemp(prefix="kmf-bench-")
+    atexit.register(_remove_data_root, os.environ["KMF_DATA_DIR"])
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from utils.family_repository import save_family_data  # noqa: E402
+from utils.households import create_household  # noqa: E402
+from utils.media_meta import audio_metadata, image_metadata  # noqa: E402
+from utils.media_store import store_upload  # noqa: E402
+
+FAMILY_SIZES = (10, 100, 1000)
+
+# (photo width, photo height, voice seconds)
+MEDIA_PROFILES = {
+    "small": (640, 480, 2),
+    "large": (4032, 3024, 20),
+}
+
+# Distinct photos/voices per household; members reuse them round-robin
+MEDIA_POOL = 12
+
+# Games are measured on their familiarisation view and in play
+SCREENS = (
+    "home",
+    "setup",
+    "meet_my_family:intro",
+    "meet_my_family:game",
+    "find_my_family:intro",
+    "find_my_family:game",
+    "who_is_speaking:intro",
+    "who_is_speaking:game",
+)
+
+# A metric regresses when it exceeds baseline * tolerance
+TOLERANCE = {"wall_ms": 1.5, "peak_kb": 1.25, "read_kb": 1.25}
+
+
+# --------------------------------------------------
+# Synthetic households
+# --------------------------------------------------
+class _Upload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def _photo(i, width, height):
+    rng = np.random.default_rng(i)
+    # Smooth gradients plus noise compress like real photos
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack(
+        [(x * (i + 1) + y) % 256, (y * 2 + i * 40) % 256, (x + y * 3) % 256],
+        axis=-1,
+    ).astype(np.uint8)
+    noise = rng.integers(0, 24, base.shape, dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(base + noise).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _voice(i, seconds, sr=44100):
+    t = np.arange(int(seconds * sr)) / sr
+    tone = 0.3 * np.sin(2 * math.pi * (120 + 15 * i) * t)
+    pcm = (tone * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def build_household(size, media):
+    household = create_household(f"bench-{media}-{size}")
+    width, height, seconds = MEDIA_PROFILES[media]
+
+    images, voices = [], []
+    for i in range(min(MEDIA_POOL, size)):
+        images.append(store_upload(
+            _Upload(_photo(i, width, height), f"p{i}.jpg"),
+            household.image_folder,
+        ))
+        voices.append(store_upload(
+            _Upload(_voice(i, seconds), f"v{i}.wav"),
+            household.audio_folder,
+        ))
+
+    # Metadata is recorded as an upload would, so the background
+    # integrity check has nothing to backfill while screens are measured
+    image_meta = {
+        name: image_metadata(os.path.join(household.image_folder, name))
+        for name in images
+    }
+    audio_meta = {
+        name: audio_metadata(os.path.join(household.audio_folder, name))
+        for name in voices
+    }
+    members = [
+        {
+            "name": f"Member {i}",
+            "relationship": ("Mother", "Grandpa", "Aunt", "Cousin")[i % 4],
+            "image": images[i % len(images)],
+            "audio": voices[i % len(voices)],
+            "image_meta": image_meta[images[i % len(images)]],
+            "audio_meta": audio_meta[voices[i % len(voices)]],
+        }
+        for i in range(size)
+    ]
+    save_family_data(members, household)
+    return household
+
+
+# --------------------------------------------------
+# Measurement
+# --------------------------------------------------
+def _read_bytes():
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _start_game(at):
+    for button in at.button:
+        if "Start" in button.label:
+            button.click()
+            at.run()
+            return
+
+
+def _drive(household, screen):
+    page, _, stage = screen.partition(":")
+    at = AppTest.from_file(
+        os.path.join(REPO_ROOT, "app.py"), default_timeout=600
+    )
+    at.query_params["household"] = household.id
+    at.session_state["page"] = page
+    at.run()
+    if stage == "game":
+        _start_game(at)
+    if at.exception:
+        raise RuntimeError(f"{screen}: {at.exception[0].message}")
+    return at
+
+
+def measure(household, screen, repeats):
+    # First run warms derivative caches; reruns are what every click costs
+    at = _drive(household, screen)
+
+    timings = []
+    read_before = _read_bytes()
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - t0) * 1000)
+    read_after = _read_bytes()
+
+    tracemalloc.start()
+    at.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "wall_ms": round(statistics.median(timings), 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+    if read_before is not None:
+        result["read_kb"] = round((read_after - read_before) / 1024 / repeats, 1)
+    return result
+
+
+# --------------------------------------------------
+# Baseline comparison
+# --------------------------------------------------
+def compare(results, baseline):
+    regressions = []
+    for key, metrics in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric, limit in TOLERANCE.items():
+            if metric in metrics and base.get(metric):
+                ratio = metrics[metric] / base[metric]
+                if ratio > limit:
+                    regressions.append(
+                        f"{key} {metric}: {metrics[metric]} vs "
+                        f"baseline {base[metric]} ({ratio:.2f}x)"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", default=",".join(map(str, FAMILY_SIZES)),
+        help="comma-separated family sizes",
+    )
+    parser.add_argument(
+        "--media", default=",".join(MEDIA_PROFILES),
+        help="comma-separated media profiles",
+    )
+    parser.add_argument("--screens", default=",".join(SCREENS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for media in args.media.split(","):
+        for size in map(int, args.sizes.split(",")):
+            household = build_household(size, media)
+            for screen in args.screens.split(","):
+                key = f"{screen}/{size}/{media}"
+                results[key] = measure(household, screen, args.repeats)
+                print(f"{key:36s} {json.dumps(results[key])}", flush=True)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=4, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --update-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f))
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print("OK" if not regressions else f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
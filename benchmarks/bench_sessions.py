@@ -0,0 +1,141 @@
+"""Per-session memory benchmark.
+
+Simulates many concurrent sessions of app.py through streamlit's AppTest.
+Each session opens setup and starts every game, and the benchmark then
+measures what that session's state holds on its own: everything reachable
+from st.session_state that is not part of the shared family store.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --sessions 100 --family 1000
+"""
+import argparse
+import atexit
+import json
+import os
+import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "KMF_DATA_DIR" not in os.environ:
+    os.environ["KMF_DATA_DIR"] = tempfile.mkdtemp(prefix="kmf-bench-")
+    atexit.register(shutil.rmtree, os.environ["KMF_DATA_DIR"], True)
+sys.path.insert(0, REPO_ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.bench_screens import build_household  # noqa: E402
+from utils.family_repository import load_family_data  # noqa: E402
+
+# Every session walks through these pages, pressing Start on each game
+JOURNEY = ("setup", "meet_my_family", "find_my_family", "who_is_speaking")
+
+
+# --------------------------------------------------
+# Object graph sizes
+# --------------------------------------------------
+def _children(obj):
+    if isinstance(obj, (dict, MappingProxyType)):
+        for key, value in obj.items():
+            yield key
+            yield value
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        yield from obj
+    elif hasattr(obj, "__dict__"):
+        yield obj.__dict__
+
+
+def _walk(obj, skip, seen):
+    """Total sys.getsizeof of the graph under obj, minus ids in skip."""
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in skip or id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        stack.extend(_children(item))
+    return total
+
+
+def _session_state(at):
+    return dict(at.session_state._state._state.filtered_state)
+
+
+def _pickled_size(state):
+    try:
+        return len(pickle.dumps(state))
+    except Exception:
+        return None
+
+
+# --------------------------------------------------
+# One simulated session
+# --------------------------------------------------
+def run_session(household):
+    at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=120)
+    at.query_params["household"] = household.id
+    for page in JOURNEY:
+        at.session_state["page"] = page
+        at.run()
+        for button in at.button:
+            if "Start" in button.label:
+                button.click()
+                at.run()
+                break
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].message}")
+    return _session_state(at)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--family", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="print one JSON object")
+    args = parser.parse_args(argv)
+
+    household = build_household(args.family, "small")
+
+    start = time.perf_counter()
+    states = [run_session(household) for _ in range(args.sessions)]
+    elapsed = time.perf_counter() - start
+
+    # Objects owned by the shared store are paid for once per process
+    store = load_family_data(household)
+    shared = set()
+    shared_bytes = _walk(store, set(), shared)
+
+    private = [_walk(state, shared, set()) for state in states]
+    pickled = [_pickled_size(state) for state in states]
+
+    result = {
+        "sessions": args.sessions,
+        "family": args.family,
+        "shared_store_kb": round(shared_bytes / 1024, 1),
+        "session_kb_median": round(statistics.median(private) / 1024, 2),
+        "sessions_total_kb": round(sum(private) / 1024, 1),
+        "pickled_kb_median": (
+            round(statistics.median(pickled) / 1024, 2)
+            if None not in pickled else None
+        ),
+        "seconds": round(elapsed, 1),
+    }
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for key, value in result.items():
+            print(f"{key:20s} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Cold-start benchmark.
+
+Starts a fresh interpreter per sample with ``python -X importtime``, runs
+app.py once on one page through streamlit's AppTest and reports:
+
+    process_ms      interpreter start to first paint, streamlit import included
+    first_paint_ms  the app's first script run
+    import_ms       time spent importing modules during that first run
+    heavy           heavy optional modules the first run pulled in
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --pages setup,home --samples 9
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ("setup", "home", "meet_my_family", "find_my_family", "who_is_speaking")
+
+# Modules the first paint of a page should only load when it needs them
+# (st.image imports PIL itself, so any page showing a photo loads it)
+HEAVY_MODULES = ("PIL.Image", "soundfile", "games.maze_render")
+
+# Written to stderr once streamlit is imported; import times after it
+# belong to the app
+MARKER = "kmf-bench-startup: app begins"
+
+
+# --------------------------------------------------
+# One cold start (runs in the child interpreter)
+# --------------------------------------------------
+def _child(page, household_id):
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, REPO_ROOT)
+    sys.stderr.write(MARKER + "\n")
+    sys.stderr.flush()
+
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=120)
+    at.query_params["household"] = household_id
+    at.session_state["page"] = page
+    at.run()
+    first_paint_ms = (time.perf_counter() - start) * 1000
+
+    if at.exception:
+        raise RuntimeError(f"{page}: {at.exception[0].message}")
+    print(json.dumps({
+        "first_paint_ms": first_paint_ms,
+        "heavy": [m for m in HEAVY_MODULES if m in sys.modules],
+    }))
+
+
+def _import_ms(stderr):
+    """Sum the top-level import times logged after MARKER."""
+    total_us = 0
+    seen_marker = False
+    for line in stderr.splitlines():
+        if line == MARKER:
+            seen_marker = True
+        elif seen_marker and line.startswith("import time:"):
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Nested imports are indented under their parent
+            if not name[1:].startswith(" ") and cumulative.strip().isdigit():
+                total_us += int(cumulative)
+    return total_us / 1000
+
+
+def cold_start(page, household_id):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [
+            sys.executable, "-X", "importtime", "-m", "benchmarks.bench_startup",
+            "--child", page, household_id,
+        ],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=False,
+    )
+    process_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = process_ms
+    result["import_ms"] = _import_ms(proc.stderr)
+    return result
+
+
+# --------------------------------------------------
+# Driver
+# --------------------------------------------------
+def _household():
+    # A small family so every page renders instead of redirecting to setup,
+    # with the thumbnails and voice renditions an upload would have made
+    from benchmarks.bench_screens import build_household
+    from utils.audio import ingest_audio
+    from utils.family_repository import load_family_data
+    from utils.thumbnails import create_thumbnails
+
+    household = build_household(10, "small")
+    members = load_family_data(household)
+    for image_name in {m["image"] for m in members}:
+        create_thumbnails(household, image_name)
+    for audio_name in {m["audio"] for m in members}:
+        ingest_audio(household, audio_name)
+    return household
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default=",".join(PAGES))
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print one JSON object")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(*args.child)
+        return 0
+
+    if "KMF_DATA_DIR" not in os.environ:
+        os.environ["KMF_DATA_DIR"] = tempfile.mkdtemp(prefix="kmf-bench-")
+        atexit.register(shutil.rmtree, os.environ["KMF_DATA_DIR"], True)
+    sys.path.insert(0, REPO_ROOT)
+    household = _household()
+
+    results = {}
+    for page in args.pages.split(","):
+        samples = [cold_start(page, household.id) for _ in range(args.samples)]
+        results[page] = {
+            metric: round(statistics.median(s[metric] for s in samples), 1)
+            for metric in ("process_ms", "first_paint_ms", "import_ms")
+        }
+        results[page]["heavy"] = samples[-1]["heavy"]
+        if not args.json:
+            print(f"{page:16s} {json.dumps(results[page])}", flush=True)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Voice index benchmark.
+
+Times voiceprint extraction for one clip, building the voice index, the
+neighbour tables behind each difficulty and planning Who Is Speaking
+rounds from them.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_voices [voices] [repeats]
+"""
+import sys
+import time
+
+import numpy as np
+
+from games.planner import PLAN_ROUNDS, plan_rounds
+from utils.voice_features import VOICEPRINT_SIZE, VoiceIndex, voiceprint_from_samples
+
+SAMPLE_RATE = 22050
+
+
+def _time(fn, repeats):
+    timings = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[-1]
+
+
+def _clip(seconds=3.0):
+    # A buzzy, slowly wobbling tone stands in for speech
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    f0 = 120 * (1 + 0.05 * np.sin(2 * np.pi * 2 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    return sum(np.sin(h * phase) / h for h in range(1, 12)).astype(np.float32)
+
+
+def main(voices=500, repeats=200):
+    clip = _clip()
+    print_median, print_max = _time(
+        lambda i: voiceprint_from_samples(clip, SAMPLE_RATE), 20
+    )
+
+    rng = np.random.default_rng(0)
+    family = [
+        {"id": i, "audio": f"{i}.wav",
+         "audio_meta": {"voiceprint": rng.normal(size=VOICEPRINT_SIZE).tolist()}}
+        for i in range(voices)
+    ]
+    voice_ids = [m["id"] for m in family]
+    build_median, _ = _time(lambda i: VoiceIndex(family), 20)
+
+    index = VoiceIndex(family)
+    print(f"{voices} voices, voiceprints of {VOICEPRINT_SIZE} values")
+    print(f"  voiceprint (3 s clip)      median {print_median:8.3f} ms  max {print_max:8.3f} ms")
+    print(f"  build index                median {build_median:8.3f} ms")
+    for label, farthest in (("hard", False), ("easy", True)):
+        median, worst = _time(
+            lambda i: VoiceIndex(family).neighbour_table(3, farthest), 5
+        )
+        print(f"  {'index + table (' + label + ')':27s}median {median:8.3f} ms  max {worst:8.3f} ms")
+
+    table = index.neighbour_table(3)
+    pools = tuple(table.get(i, ()) for i in voice_ids)
+    ids = tuple(voice_ids)
+    for label, neighbours in (("normal", None), ("hard", pools)):
+        median, worst = _time(
+            lambda i: plan_rounds.__wrapped__(i, 0, ids, 3, neighbours), repeats
+        )
+        print(f"  {f'plan {PLAN_ROUNDS} rounds ({label})':27s}median {median:8.3f} ms  max {worst:8.3f} ms")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
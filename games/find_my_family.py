@@ -1,115 +1,86 @@
 import streamlit as st
-import json
-import os
-import random
-from PIL import Image
-
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
-
-GRID_SIZE = 5
-
-# ✅ FIXED SOLVABLE MAZE (1 = path, 0 = wall)
-MAZE = [
-    [1, 1, 1, 1, 1],
-    [0, 0, 1, 1, 1],
-    [1, 1, 1, 0, 1],
-    [1, 0, 0, 1, 1],
-    [1, 1, 1, 0, 1],
+
+from games.maze import generate_maze
+from games.maze_board import maze_board, maze_id, replay
+from games.maze_render import BOARD_PIXELS, render_board
+from games.planner import take_round
+from utils.family_repository import load_family_data
+from utils.gallery import member_gallery, member_photo
+from utils.households import current_household
+from utils.kinship import kinship
+from utils.member_store import is_ready
+from utils.thumbnails import thumbnail_path
+
+# Maze sizes in cells (rows, cols); every maze is generated solvable
+MAZE_SIZES = {
+    "Small": (3, 3),
+    "Medium": (5, 5),
+    "Big": (8, 8),
+}
+
+CONTROLS = {
+    "Keyboard & taps": "browser",
+    "Big buttons": "buttons",
+}
+
+GAME_KEYS = [
+    "started", "pos", "target_id", "msg", "maze_dims", "maze_seed", "show_path",
+    "controls", "fm_seq",
 ]
 
-START = (0, 0)
-END = (4, 4)
+DIRECTION_NAMES = {
+    (-1, 0): "⬆ Up",
+    (1, 0): "⬇ Down",
+    (0, -1): "⬅ Left",
+    (0, 1): "➡ Right",
+}
 
-# -----------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
 
 # -----------------------------------
-def find_my_family_screen(go_to):
-
-    st.title("🧭 Find My Family")
-
-    family = load_family_data()
-    if not family:
-        st.warning("Please complete Family Setup first.")
-        if st.button("⬅ Back to Setup"):
-            go_to("setup")
-        return
+def current_maze():
+    rows, cols = st.session_state.maze_dims
+    return generate_maze(rows, cols, st.session_state.maze_seed)
 
-    # -----------------------------------
-    # SESSION STATE INIT
-    # -----------------------------------
-    if "started" not in st.session_state:
-        st.session_state.started = False
-
-    if "pos" not in st.session_state:
-        st.session_state.pos = START
-
-    if "target" not in st.session_state:
-        st.session_state.target = random.choice(family)
-
-    if "msg" not in st.session_state:
-        st.session_state.msg = ""
-
-    # =====================================================
-    # START SCREEN (FAMILY VIEW)
-    # =====================================================
-    if not st.session_state.started:
-        st.subheader("👨‍👩‍👧 My Family")
 
-        cols = st.columns(3)
-        for i, m in enumerate(family):
-            with cols[i % 3]:
-                img = os.path.join(IMAGE_FOLDER, m["image"])
-                if os.path.exists(img):
-                    st.image(Image.open(img), width=120)
-                st.write(f"**{m['name']}**")
-                st.write(m["relationship"])
+# -----------------------------------
+# Moves handled in the browser (no rerun per move)
+# -----------------------------------
+def play_in_browser(maze, target_thumb):
+    report = maze_board(
+        maze, target_thumb, key=f"maze_board_{maze_id(maze)}"
+    )
 
-        if st.button("▶ Start Game"):
-            st.session_state.started = True
-            st.session_state.msg = ""   # ✅ CLEAR ERROR
-            st.rerun()
+    # Apply each move log once, re-checking it against the maze
+    if (
+        report
+        and report["maze"] == maze_id(maze)
+        and report["seq"] > st.session_state.get("fm_seq", 0)
+    ):
+        st.session_state.fm_seq = report["seq"]
+        new_pos = replay(maze, maze.start, report["moves"])
+        if new_pos is not None:
+            st.session_state.pos = new_pos
 
-        if st.button("⬅ Back to Home"):
-            go_to("home")
 
-        return
+# -----------------------------------
+# Moves handled on the server (one rerun per button press)
+# -----------------------------------
+def play_with_buttons(maze, target_thumb):
+    st.caption(f"{maze.distance(st.session_state.pos)} steps to go")
 
     # =====================================================
-    # TASK
+    # DRAW MAZE (one composited image)
     # =====================================================
-    st.info(
-        f"👶 Go to "
-        f"**{st.session_state.target['relationship']} "
-        f"({st.session_state.target['name']})**"
+    st.image(
+        render_board(
+            maze,
+            st.session_state.pos,
+            target_thumb,
+            show_path=st.session_state.get("show_path", False),
+        ),
+        width=BOARD_PIXELS,
     )
 
-    # =====================================================
-    # DRAW MAZE GRID
-    # =====================================================
-    for r in range(GRID_SIZE):
-        cols = st.columns(GRID_SIZE)
-        for c in range(GRID_SIZE):
-            with cols[c]:
-                if (r, c) == st.session_state.pos:
-                    st.markdown("👶")
-                elif (r, c) == END:
-                    img = os.path.join(
-                        IMAGE_FOLDER,
-                        st.session_state.target["image"]
-                    )
-                    if os.path.exists(img):
-                        st.image(Image.open(img), width=45)
-                elif MAZE[r][c] == 1:
-                    st.markdown("🟣")
-                else:
-                    st.markdown("⬛")
-
     # =====================================================
     # MESSAGE
     # =====================================================
@@ -122,7 +93,7 @@ def find_my_family_screen(go_to):
     r, c = st.session_state.pos
 
     def move(nr, nc):
-        if 0 <= nr < GRID_SIZE and 0 <= nc < GRID_SIZE and MAZE[nr][nc] == 1:
+        if maze.is_open(nr, nc):
             st.session_state.pos = (nr, nc)
             st.session_state.msg = ""
         else:
@@ -148,19 +119,136 @@ def find_my_family_screen(go_to):
         if st.button("⬇ Down"):
             move(r + 1, c)
 
+    # =====================================================
+    # HELP
+    # =====================================================
+    col1, col2 = st.columns(2)
+
+    with col1:
+        if st.button("💡 Hint"):
+            step = maze.hint((r, c))
+            if step:
+                direction = (step[0] - r, step[1] - c)
+                st.session_state.msg = f"💡 Try {DIRECTION_NAMES[direction]}"
+                st.rerun()
+
+    with col2:
+        st.checkbox("Show me the way", key="show_path")
+
+
+# -----------------------------------
+# Family view card
+# -----------------------------------
+def _member_card(household, m, label):
+    member_photo(household, m, 120)
+    st.write(f"**{m['name']}**")
+    st.write(label)
+
+
+# -----------------------------------
+def find_my_family_screen(go_to):
+
+    st.title("🧭 Find My Family")
+
+    household = current_household()
+    family = load_family_data(household)
+    if not family:
+        st.warning("Please complete Family Setup first.")
+        if st.button("⬅ Back to Setup"):
+            go_to("setup")
+        return
+
+    # -----------------------------------
+    # SESSION STATE INIT
+    # -----------------------------------
+    if "started" not in st.session_state:
+        st.session_state.started = False
+
+    # The session keeps the target's ID; pick again if it was deleted
+    # With a player chosen in setup, targets are their relatives and are
+    # named by how they are related (precomputed, not traversed per rerun)
+    graph = kinship(household, family)
+    player = st.session_state.get("player_id")
+    if player not in family.ids:
+        player = None
+
+    target = family.get(st.session_state.get("target_id"))
+    if target is None:
+        # Members whose uploads are still being prepared have no thumbnails
+        relatives = family.pick(graph.related(player)) if player else ()
+        candidates = (
+            [m for m in relatives if is_ready(m)]
+            or [m for m in family if is_ready(m)]
+            or family
+        )
+        # The session's plan gives the target and the maze it is hidden in
+        planned = take_round("fm", [m["id"] for m in candidates])
+        target = family.get(planned.target)
+        st.session_state.target_id = target["id"]
+        st.session_state.maze_seed = planned.maze_seed
+
+    if "msg" not in st.session_state:
+        st.session_state.msg = ""
+
+    # =====================================================
+    # START SCREEN (FAMILY VIEW)
+    # =====================================================
+    if not st.session_state.started:
+        st.subheader("👨‍👩‍👧 My Family")
+
+        member_gallery(
+            family, "fm_intro",
+            lambda m, i: _member_card(household, m, graph.label(player, m)),
+        )
+
+        size = st.radio("Maze size", list(MAZE_SIZES), horizontal=True)
+        controls = st.radio("Controls", list(CONTROLS), horizontal=True)
+
+        if st.button("▶ Start Game"):
+            st.session_state.started = True
+            st.session_state.msg = ""   # ✅ CLEAR ERROR
+            st.session_state.controls = CONTROLS[controls]
+            st.session_state.maze_dims = MAZE_SIZES[size]
+            st.session_state.pos = current_maze().start
+            st.rerun()
+
+        if st.button("⬅ Back to Home"):
+            go_to("home")
+
+        return
+
+    # =====================================================
+    # TASK
+    # =====================================================
+    st.info(
+        f"👶 Go to "
+        f"**{graph.label(player, target)} "
+        f"({target['name']})**"
+    )
+
+    maze = current_maze()
+    target_thumb = (
+        thumbnail_path(household, target["image"], 45) if is_ready(target) else None
+    )
+
+    if st.session_state.controls == "buttons":
+        play_with_buttons(maze, target_thumb)
+    else:
+        play_in_browser(maze, target_thumb)
+
     # =====================================================
     # SUCCESS
     # =====================================================
-    if st.session_state.pos == END:
+    if st.session_state.pos == maze.goal:
         st.balloons()
-        st.success(f"🎉 You reached {st.session_state.target['name']}!")
+        st.success(f"🎉 You reached {target['name']}!")
 
         if st.button("🔁 Play Again"):
-            for k in ["started", "pos", "target", "msg"]:
+            for k in GAME_KEYS:
                 st.session_state.pop(k, None)
             st.rerun()
 
     if st.button("⬅ Back to Home"):
-        for k in ["started", "pos", "target", "msg"]:
+        for k in GAME_KEYS:
             st.session_state.pop(k, None)
         go_to("home")
@@ -0,0 +1,263 @@
+import json
+import os
+import shutil
+import threading
+import zipfile
+from dataclasses import dataclass
+
+from games.find_my_family import MAZE_SIZES
+from games.maze import generate_maze
+from games.maze_render import BOARD_PIXELS
+from games.planner import PLAN_ROUNDS, plan_rounds
+from games.recall import ROUND_SIZE
+from games.who_is_speaking import DISTRACTORS, voice_pools
+from utils.audio import audio_path
+from utils.family_repository import load_family_data
+from utils.kinship import kinship
+from utils.media_store import replacing
+from utils.member_store import is_ready
+from utils.thumbnails import thumbnail_path
+from utils.voice_features import DIFFICULTIES
+
+# Pack layout (a folder any static host, or the file system, can serve):
+#   index.html, games.js, style.css   the three games, copied from frontend/
+#   family.js                         members and planned rounds
+#   media/...                         pre-sized photos and compressed voices
+# The data is a script rather than JSON so the pack also plays from a
+# local folder, where browsers refuse to fetch() files.
+PACK_VERSION = 1
+DATA_FILE = "family.js"
+MEDIA_FOLDER = "media"
+STATE_FILE = ".pack-state.json"
+
+# Photos are packed once, at the size of the game cards
+PHOTO_WIDTH = 150
+
+# The same seed gives the same rounds, so rebuilding an unchanged family
+# leaves family.js untouched
+DEFAULT_SEED = 0
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+# One build at a time per pack folder: a build removes files an earlier
+# one packed, which must not happen under another build or a zip of it
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+@dataclass
+class PackResult:
+    copied: int = 0
+    reused: int = 0
+    removed: int = 0
+
+
+def pack_folder(household):
+    """Where the household's offline game pack is built."""
+    return os.path.join(household.root, "exports", "game_pack")
+
+
+def pack_archive_path(household):
+    return os.path.join(household.root, "exports", "game_pack.zip")
+
+
+# --------------------------------------------------
+# Planned rounds (the same rules as the games on the server)
+# --------------------------------------------------
+def _blocks(ids):
+    # Enough plan blocks for every member to be the target at least once
+    return range(max(1, -(-len(ids) // PLAN_ROUNDS)))
+
+
+def _meet_rounds(seed, ids):
+    width = min(ROUND_SIZE, len(ids))
+    if width == 0:
+        return []
+    rounds = []
+    for block in _blocks(ids):
+        # A round is a target plus others, so every member takes turns
+        plan = plan_rounds(seed, block, tuple(ids), width, width=width)
+        rounds += [
+            {"names": names, "photos": [names[i] for i in order[0]]}
+            for names, order in zip(plan.options.tolist(), plan.orders.tolist())
+        ]
+    return rounds
+
+
+def _find_rounds(seed, ids):
+    if not ids:
+        return []
+    rounds = []
+    for block in _blocks(ids):
+        plan = plan_rounds(seed, block, tuple(ids))
+        for target, maze_seed in zip(plan.targets.tolist(), plan.maze_seeds.tolist()):
+            mazes = {}
+            for size, (rows, cols) in MAZE_SIZES.items():
+                maze = generate_maze(rows, cols, maze_seed)
+                mazes[size] = {
+                    "grid": ["".join(map(str, row)) for row in maze.grid.tolist()],
+                    "start": list(maze.start),
+                    "goal": list(maze.goal),
+                }
+            rounds.append({"target": target, "mazes": mazes})
+    return rounds
+
+
+def _speak_rounds(household, family, seed, ids):
+    if len(ids) < 2:
+        return {}
+    rounds = {}
+    for difficulty in DIFFICULTIES:
+        pools = voice_pools(household, family, ids, difficulty)
+        rounds[difficulty] = []
+        for block in _blocks(ids):
+            plan = plan_rounds(seed, block, tuple(ids), DISTRACTORS + 1, pools)
+            rounds[difficulty] += [
+                {"target": target, "options": options}
+                for target, options in zip(plan.targets.tolist(), plan.options.tolist())
+            ]
+    return rounds
+
+
+# --------------------------------------------------
+# Incremental file copies
+# --------------------------------------------------
+class _Files:
+    """Copies sources into the pack, skipping those unchanged since the
+    last build, and removes what the new build no longer uses."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.result = PackResult()
+        self._wanted = {}
+        try:
+            with open(os.path.join(folder, STATE_FILE), encoding="utf-8") as f:
+                self._previous = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._previous = {}
+
+    def add(self, name, source):
+        """Pack ``source`` as ``name`` (a path inside the pack)."""
+        stat = os.stat(source)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        self._wanted[name] = stamp
+        out_path = os.path.join(self.folder, name)
+        if self._previous.get(name) == stamp and os.path.exists(out_path):
+            self.result.reused += 1
+            return name
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with replacing(out_path) as f, open(source, "rb") as src:
+            shutil.copyfileobj(src, f)
+        self.result.copied += 1
+        return name
+
+    def write(self, name, data):
+        out_path = os.path.join(self.folder, name)
+        try:
+            with open(out_path, "rb") as f:
+                if f.read() == data:
+                    return
+        except FileNotFoundError:
+            pass
+        with replacing(out_path) as f:
+            f.write(data)
+
+    def finish(self):
+        for name in self._previous.keys() - self._wanted.keys():
+            try:
+                os.remove(os.path.join(self.folder, name))
+                self.result.removed += 1
+            except FileNotFoundError:
+                pass
+        self.write(STATE_FILE, json.dumps(self._wanted, sort_keys=True).encode("utf-8"))
+        return self.result
+
+
+def _media_name(path):
+    # Stored files are named after their content, so a changed photo or
+    # voice gets a new name and old ones are never overwritten in place
+    return f"{MEDIA_FOLDER}/{os.path.basename(path)}"
+
+
+# --------------------------------------------------
+# Build
+# --------------------------------------------------
+def pack_lock(folder):
+    """The lock held while the pack in ``folder`` is built; hold it to read
+    a consistent pack (it is reentrant, so a holder may also build)."""
+    folder = os.path.abspath(folder)
+    with _locks_lock:
+        if folder not in _locks:
+            _locks[folder] = threading.RLock()
+        return _locks[folder]
+
+
+def build_game_pack(household, folder=None, player=None, seed=DEFAULT_SEED):
+    """Write the household's offline game pack and return a PackResult.
+
+    Photos and voices come from the thumbnail and rendition caches, which
+    only render what is missing, and are copied only when they changed
+    since the last build. ``player`` names members by how they are
+    related to that member, as in the games.
+    """
+    folder = folder or pack_folder(household)
+    with pack_lock(folder):
+        return _build(household, folder, player, seed)
+
+
+def _build(household, folder, player, seed):
+    os.makedirs(folder, exist_ok=True)
+    family = load_family_data(household)
+    graph = kinship(household, family)
+    files = _Files(folder)
+
+    for name in sorted(os.listdir(_FRONTEND)):
+        files.add(name, os.path.join(_FRONTEND, name))
+
+    members = []
+    for m in family:
+        photo = thumbnail_path(household, m["image"], PHOTO_WIDTH) if is_ready(m) else None
+        if photo is None:
+            continue
+        entry = {
+            "id": m["id"],
+            "name": m["name"],
+            "label": graph.label(player, m),
+            "photo": files.add(_media_name(photo), photo),
+        }
+        if m.get("audio"):
+            for field, kind in (("voice", "voice"), ("preview", "preview")):
+                path = audio_path(household, m["audio"], kind)
+                if path:
+                    entry[field] = files.add(_media_name(path), path)
+        members.append(entry)
+
+    ids = [m["id"] for m in members]
+    voice_ids = [m["id"] for m in members if m.get("voice")]
+    data = {
+        "version": PACK_VERSION,
+        "board_pixels": BOARD_PIXELS,
+        "members": members,
+        "meet": _meet_rounds(seed, ids),
+        "find": _find_rounds(seed, ids),
+        "speak": _speak_rounds(household, family, seed, voice_ids),
+    }
+    script = "window.KMF_FAMILY = " + json.dumps(data, separators=(",", ":")) + ";\n"
+    files.write(DATA_FILE, script.encode("utf-8"))
+    return files.finish()
+
+
+def write_pack_archive(folder, fileobj):
+    """Zip a built pack for download; media is stored, text deflated."""
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_STORED) as zf:
+        for root, _, names in os.walk(folder):
+            for name in sorted(names):
+                if name == STATE_FILE or name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                arcname = os.path.relpath(path, folder).replace(os.sep, "/")
+                compress = (
+                    zipfile.ZIP_STORED if arcname.startswith(MEDIA_FOLDER + "/")
+                    else zipfile.ZIP_DEFLATED
+                )
+                zf.write(path, arcname, compress)
@@ -0,0 +1,27 @@
+"""Build a household's offline game pack.
+
+Run from the repository root (KMF_DATA_DIR selects the data folder):
+
+    python -m games.game_pack [household] [folder]
+
+The folder can then be opened locally or uploaded to any static host;
+running the command again only copies photos and voices that changed.
+"""
+import sys
+
+from games.game_pack import build_game_pack, pack_folder
+from utils.households import DEFAULT_HOUSEHOLD, get_household
+
+
+def main(household_id=DEFAULT_HOUSEHOLD, folder=None):
+    household = get_household(household_id, create=False)
+    folder = folder or pack_folder(household)
+    result = build_game_pack(household, folder)
+    print(
+        f"{folder}: {result.copied} files copied, {result.reused} unchanged, "
+        f"{result.removed} removed"
+    )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
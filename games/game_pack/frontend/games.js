@@ -0,0 +1,334 @@
+// Offline versions of the three games. Every round was planned when the
+// pack was built (family.js), so playing never needs a server.
+const FAMILY = window.KMF_FAMILY;
+const MEMBERS = new Map(FAMILY.members.map((m) => [m.id, m]));
+
+const STEPS = { U: [-1, 0], D: [1, 0], L: [0, -1], R: [0, 1] };
+const KEYS = {
+  ArrowUp: "U", ArrowDown: "D", ArrowLeft: "L", ArrowRight: "R",
+  w: "U", s: "D", a: "L", d: "R",
+};
+const STEP_NAMES = { U: "⬆ Up", D: "⬇ Down", L: "⬅ Left", R: "➡ Right" };
+const LEVEL_NAMES = {
+  easy: "🙂 Easy (very different voices)",
+  normal: "😀 Normal",
+  hard: "🤓 Hard (similar voices)",
+};
+
+const $ = (id) => document.getElementById(id);
+
+function el(tag, attrs, ...children) {
+  const node = document.createElement(tag);
+  for (const [name, value] of Object.entries(attrs || {})) {
+    if (name.startsWith("on")) node.addEventListener(name.slice(2), value);
+    else node.setAttribute(name, value);
+  }
+  node.append(...children);
+  return node;
+}
+
+function say(id, text) {
+  $(id).textContent = text;
+}
+
+// Each game walks its planned rounds from a random starting point
+function rounds(list) {
+  let next = Math.floor(Math.random() * list.length);
+  return () => list[next++ % list.length];
+}
+
+function card(member, extra) {
+  return el("div", { class: "card" },
+    el("img", { src: member.photo, alt: member.name, loading: "lazy" }),
+    el("strong", {}, member.name),
+    el("span", { class: "label" }, member.label),
+    ...(extra || []));
+}
+
+function choice(id, options, labels, current, onChange) {
+  const box = $(id);
+  box.replaceChildren(...options.map((option) => el("button", {
+    class: option === current ? "chosen" : "",
+    onclick: () => {
+      onChange(option);
+      choice(id, options, labels, option, onChange);
+    },
+  }, labels[option] || option)));
+}
+
+// --------------------------------------------------
+// Screens
+// --------------------------------------------------
+const SCREENS = {};
+
+function show(name) {
+  document.querySelectorAll("main > section").forEach((section) => {
+    section.hidden = section.id !== name;
+  });
+  if (SCREENS[name]) SCREENS[name]();
+  window.scrollTo(0, 0);
+}
+
+document.querySelectorAll("[data-go]").forEach((button) => {
+  button.addEventListener("click", () => show(button.dataset.go));
+});
+
+// --------------------------------------------------
+// Meet My Family
+// --------------------------------------------------
+const meet = { next: rounds(FAMILY.meet), round: null, selected: null, matched: new Set() };
+
+function meetStart() {
+  meet.round = meet.next();
+  meet.selected = null;
+  meet.matched = new Set();
+  say("meet-msg", "");
+  meetDraw();
+}
+
+function meetPick(id) {
+  if (meet.selected === null) {
+    say("meet-msg", "Tap a name first 🙂");
+    return;
+  }
+  if (meet.selected === id) {
+    meet.matched.add(id);
+    say("meet-msg", meet.matched.size === meet.round.names.length
+      ? "Great job! You matched everyone!" : "Correct! 🎉");
+  } else {
+    say("meet-msg", "Try again 🙂");
+  }
+  meet.selected = null;
+  meetDraw();
+}
+
+function meetDraw() {
+  $("meet-names").replaceChildren(...meet.round.names.map((id) => {
+    const matched = meet.matched.has(id);
+    return el("button", {
+      class: matched ? "matched" : meet.selected === id ? "selected" : "",
+      onclick: () => {
+        if (matched) return;
+        meet.selected = id;
+        say("meet-msg", "");
+        meetDraw();
+      },
+    }, MEMBERS.get(id).name);
+  }));
+  $("meet-photos").replaceChildren(...meet.round.photos.map((id) => {
+    return el("div", {
+      class: "card clickable" + (meet.matched.has(id) ? " matched" : ""),
+      onclick: () => meetPick(id),
+    }, el("img", { src: MEMBERS.get(id).photo, alt: "" }));
+  }));
+}
+
+SCREENS.meet = () => {
+  if (!meet.round) meetStart();
+};
+$("meet-next").addEventListener("click", meetStart);
+
+// --------------------------------------------------
+// Find My Family
+// --------------------------------------------------
+const SIZES = FAMILY.find.length ? Object.keys(FAMILY.find[0].mazes) : [];
+const find = { next: rounds(FAMILY.find), size: SIZES[0], game: null };
+
+// Steps to the goal from every open square
+function distances(grid, goal) {
+  const rows = grid.length, cols = grid[0].length;
+  const dist = new Array(rows * cols).fill(-1);
+  const queue = [goal];
+  dist[goal[0] * cols + goal[1]] = 0;
+  while (queue.length) {
+    const [r, c] = queue.shift();
+    for (const [dr, dc] of Object.values(STEPS)) {
+      const nr = r + dr, nc = c + dc;
+      if (nr < 0 || nr >= rows || nc < 0 || nc >= cols) continue;
+      if (grid[nr][nc] !== "1" || dist[nr * cols + nc] !== -1) continue;
+      dist[nr * cols + nc] = dist[r * cols + c] + 1;
+      queue.push([nr, nc]);
+    }
+  }
+  return dist;
+}
+
+function isOpen(r, c) {
+  const game = find.game;
+  return r >= 0 && r < game.rows && c >= 0 && c < game.cols &&
+    game.grid[r][c] === "1";
+}
+
+function hintStep(r, c) {
+  const game = find.game;
+  const d = game.dist[r * game.cols + c];
+  for (const key of "UDLR") {
+    const [dr, dc] = STEPS[key];
+    const nr = r + dr, nc = c + dc;
+    if (isOpen(nr, nc) && game.dist[nr * game.cols + nc] === d - 1) return key;
+  }
+  return null;
+}
+
+function drawBoard() {
+  const game = find.game, ctx = game.ctx, cell = game.cell;
+  for (let r = 0; r < game.rows; r++) {
+    for (let c = 0; c < game.cols; c++) {
+      ctx.fillStyle = game.grid[r][c] === "1" ? "#baa0e6" : "#28283c";
+      ctx.fillRect(c * cell, r * cell, cell, cell);
+    }
+  }
+  const sprite = Math.max(cell, 24);
+  const box = (p) => [p[1] * cell + cell / 2 - sprite / 2, p[0] * cell + cell / 2 - sprite / 2];
+  if (game.target.complete && game.target.naturalWidth) {
+    const [x, y] = box(game.goal);
+    ctx.drawImage(game.target, x, y, sprite, sprite);
+  }
+  const [x, y] = box(game.pos);
+  ctx.beginPath();
+  ctx.arc(x + sprite / 2, y + sprite / 2, sprite / 2 - 2, 0, 2 * Math.PI);
+  ctx.fillStyle = "#ffaa3c";
+  ctx.fill();
+  ctx.lineWidth = Math.max(1, sprite / 12);
+  ctx.strokeStyle = "#783c00";
+  ctx.stroke();
+}
+
+function move(key) {
+  const game = find.game;
+  if (!game || game.done) return;
+  const [dr, dc] = STEPS[key];
+  const r = game.pos[0] + dr, c = game.pos[1] + dc;
+  if (!isOpen(r, c)) {
+    say("find-msg", "🚫 Can't go that way!");
+    return;
+  }
+  game.pos = [r, c];
+  say("find-msg", "");
+  drawBoard();
+  if (r === game.goal[0] && c === game.goal[1]) {
+    game.done = true;
+    say("find-msg", `🎉 You reached ${game.member.name}!`);
+  }
+}
+
+function findStart() {
+  const round = find.next();
+  const maze = round.mazes[find.size];
+  const member = MEMBERS.get(round.target);
+  const canvas = $("board");
+  const rows = maze.grid.length, cols = maze.grid[0].length;
+  const cell = Math.max(1, Math.floor(FAMILY.board_pixels / Math.max(rows, cols)));
+  canvas.width = cols * cell;
+  canvas.height = rows * cell;
+
+  const target = new Image();
+  find.game = {
+    grid: maze.grid, dist: distances(maze.grid, maze.goal), rows: rows, cols: cols,
+    cell: cell, pos: maze.start.slice(), goal: maze.goal, member: member,
+    ctx: canvas.getContext("2d"), target: target, done: false,
+  };
+  target.onload = drawBoard;
+  target.src = member.photo;
+
+  $("find-task").textContent = `👶 Go to ${member.label} (${member.name})`;
+  say("find-msg", "");
+  $("find-start").hidden = true;
+  $("find-play").hidden = false;
+  drawBoard();
+  canvas.focus();
+}
+
+SCREENS.find = () => {
+  find.game = null;
+  $("find-start").hidden = false;
+  $("find-play").hidden = true;
+  $("find-family").replaceChildren(...FAMILY.members.map((m) => card(m)));
+  choice("find-sizes", SIZES, {}, find.size, (size) => { find.size = size; });
+  $("find-go").disabled = !FAMILY.find.length;
+};
+$("find-go").addEventListener("click", findStart);
+$("find-again").addEventListener("click", () => show("find"));
+
+$("find-hint").addEventListener("click", () => {
+  const game = find.game;
+  if (!game || game.done) return;
+  const key = hintStep(game.pos[0], game.pos[1]);
+  if (key) say("find-msg", "💡 Try " + STEP_NAMES[key]);
+});
+
+document.addEventListener("keydown", (event) => {
+  const key = KEYS[event.key];
+  if (key && find.game && !$("find").hidden) {
+    event.preventDefault();
+    move(key);
+  }
+});
+
+document.querySelectorAll("#pad button").forEach((button) => {
+  button.addEventListener("click", () => move(button.dataset.move));
+});
+
+// Tapping the board steps towards the tapped square
+$("board").addEventListener("pointerdown", (event) => {
+  const game = find.game;
+  if (!game) return;
+  const rect = event.target.getBoundingClientRect();
+  const c = Math.floor((event.clientX - rect.left) / game.cell);
+  const r = Math.floor((event.clientY - rect.top) / game.cell);
+  const dr = r - game.pos[0], dc = c - game.pos[1];
+  if (dr === 0 && dc === 0) return;
+  if (Math.abs(dr) >= Math.abs(dc)) move(dr < 0 ? "U" : "D");
+  else move(dc < 0 ? "L" : "R");
+});
+
+// --------------------------------------------------
+// Who Is Speaking
+// --------------------------------------------------
+const LEVELS = Object.keys(FAMILY.speak);
+const speak = {
+  level: LEVELS.includes("normal") ? "normal" : LEVELS[0],
+  next: Object.fromEntries(LEVELS.map((level) => [level, rounds(FAMILY.speak[level])])),
+};
+
+function speakStart() {
+  const round = speak.next[speak.level]();
+  $("speak-voice").src = MEMBERS.get(round.target).voice;
+  say("speak-msg", "");
+  $("speak-options").replaceChildren(...round.options.map((id) => {
+    const member = MEMBERS.get(id);
+    return el("div", { class: "card" },
+      el("img", { src: member.photo, alt: "" }),
+      el("button", {
+        onclick: () => say("speak-msg", id === round.target
+          ? "🎉 Correct! Great listening!" : "❌ Try again 🙂"),
+      }, member.name));
+  }));
+  $("speak-intro").hidden = true;
+  $("speak-play").hidden = false;
+}
+
+SCREENS.speak = () => {
+  $("speak-voice").pause();
+  $("speak-empty").hidden = LEVELS.length > 0;
+  $("speak-intro").hidden = LEVELS.length === 0;
+  $("speak-play").hidden = true;
+  $("speak-family").replaceChildren(...FAMILY.members
+    .filter((m) => m.voice)
+    .map((m) => card(m, [el("audio", { controls: "", preload: "none", src: m.preview || m.voice })])));
+  choice("speak-levels", LEVELS, LEVEL_NAMES, speak.level, (level) => { speak.level = level; });
+};
+$("speak-go").addEventListener("click", speakStart);
+$("speak-again").addEventListener("click", speakStart);
+
+// --------------------------------------------------
+// Home
+// --------------------------------------------------
+SCREENS.home = () => {
+  $("home-empty").hidden = FAMILY.members.length > 0;
+  document.querySelectorAll("#home .menu button").forEach((button) => {
+    button.disabled = FAMILY.members.length === 0;
+  });
+};
+
+show("home");
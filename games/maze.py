@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+# Grid values (same convention as the original hand-made maze)
+WALL = 0
+PATH = 1
+
+MOVES = {
+    "up": (-1, 0),
+    "down": (1, 0),
+    "left": (0, -1),
+    "right": (0, 1),
+}
+
+
+# --------------------------------------------------
+# Maze
+# --------------------------------------------------
+@dataclass(frozen=True, eq=False)
+class Maze:
+    seed: int
+    grid: np.ndarray   # (2*rows+1, 2*cols+1), 1 = path, 0 = wall
+    dist: np.ndarray   # steps to the goal from every path square, -1 on walls
+    start: tuple
+    goal: tuple
+
+    @property
+    def shape(self):
+        return self.grid.shape
+
+    def is_open(self, r, c):
+        h, w = self.grid.shape
+        return 0 <= r < h and 0 <= c < w and self.grid[r, c] == PATH
+
+    def distance(self, pos):
+        return int(self.dist[pos])
+
+    def hint(self, pos):
+        """Next square on the shortest path to the goal, or None at the goal."""
+        d = self.dist[pos]
+        if d <= 0:
+            return None
+        r, c = pos
+        for dr, dc in MOVES.values():
+            nr, nc = r + dr, c + dc
+            if self.is_open(nr, nc) and self.dist[nr, nc] == d - 1:
+                return (nr, nc)
+        return None
+
+    def shortest_path(self, pos):
+        path = [tuple(pos)]
+        step = self.hint(pos)
+        while step is not None:
+            path.append(step)
+            step = self.hint(step)
+        return path
+
+
+# --------------------------------------------------
+# Generation (vectorised sidewinder)
+# --------------------------------------------------
+def _carve(rows, cols, rng):
+    # east[r, c]: passage between cell (r, c) and (r, c + 1)
+    east = rng.random((rows, max(cols - 1, 0))) < 0.5
+    east[0, :] = True
+
+    # Runs are maximal east-connected stretches of a row
+    starts = np.ones((rows, cols), dtype=bool)
+    starts[:, 1:] = ~east
+    run_id = np.cumsum(starts, axis=1) - 1
+
+    # Each run below the top row opens north from one random member
+    group = (np.arange(rows)[:, None] * cols + run_id).ravel()
+    order = np.lexsort((rng.random(rows * cols), group))
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = group[order][1:] != group[order][:-1]
+    chosen = order[last]
+    north_col = np.full(rows * cols, -1)
+    north_col[group[chosen]] = chosen % cols
+    north_col = north_col.reshape(rows, cols)
+
+    # (row, col) of every cell that opens north
+    north = np.divmod(chosen[chosen >= cols], cols)
+
+    return east, run_id, north_col, north
+
+
+def _distance_field(rows, cols, east, run_id, north_col, north, goal_col):
+    # Cell-space distance (in grid steps) to the goal cell in the top row
+    cell_dist = np.empty((rows, cols), dtype=np.int32)
+    col_idx = np.arange(cols)
+    cell_dist[0] = 2 * np.abs(col_idx - goal_col)
+
+    for r in range(1, rows):
+        k = north_col[r][run_id[r]]
+        cell_dist[r] = cell_dist[r - 1][k] + 2 + 2 * np.abs(col_idx - k)
+
+    h, w = 2 * rows + 1, 2 * cols + 1
+    grid = np.zeros((h, w), dtype=np.uint8)
+    dist = np.full((h, w), -1, dtype=np.int32)
+
+    grid[1::2, 1::2] = PATH
+    dist[1::2, 1::2] = cell_dist
+
+    # East passages sit between two cells; one step from the nearer one
+    er, ec = np.nonzero(east)
+    grid[2 * er + 1, 2 * ec + 2] = PATH
+    dist[2 * er + 1, 2 * ec + 2] = (
+        np.minimum(cell_dist[er, ec], cell_dist[er, ec + 1]) + 1
+    )
+
+    # North passages lead up from each run's chosen cell
+    nr, nc = north
+    grid[2 * nr, 2 * nc + 1] = PATH
+    dist[2 * nr, 2 * nc + 1] = cell_dist[nr - 1, nc] + 1
+
+    return grid, dist
+
+
+@lru_cache(maxsize=256)
+def generate_maze(rows, cols, seed):
+    """Generate a perfect (always solvable) maze of rows x cols cells.
+
+    Mazes are deterministic per (rows, cols, seed) and cached, so every
+    session playing the same seed shares one read-only copy.
+    """
+    if rows < 1 or cols < 1:
+        raise ValueError("A maze needs at least one row and one column")
+
+    rng = np.random.default_rng(seed)
+    goal_col = int(rng.integers(cols))
+    grid, dist = _distance_field(rows, cols, *_carve(rows, cols, rng), goal_col)
+
+    goal = (1, 2 * goal_col + 1)
+    start = np.unravel_index(np.argmax(dist), dist.shape)
+
+    # Random mirroring so the open corridor is not always along the top
+    if rng.random() < 0.5:
+        grid, dist = grid[::-1], dist[::-1]
+        goal = (grid.shape[0] - 1 - goal[0], goal[1])
+        start = (grid.shape[0] - 1 - start[0], start[1])
+    if rng.random() < 0.5:
+        grid, dist = grid[:, ::-1], dist[:, ::-1]
+        goal = (goal[0], grid.shape[1] - 1 - goal[1])
+        start = (start[0], grid.shape[1] - 1 - start[1])
+
+    grid = np.ascontiguousarray(grid)
+    dist = np.ascontiguousarray(dist)
+    grid.setflags(write=False)
+    dist.setflags(write=False)
+
+    return Maze(
+        seed=seed,
+        grid=grid,
+        dist=dist,
+        start=(int(start[0]), int(start[1])),
+        goal=(int(goal[0]), int(goal[1])),
+    )
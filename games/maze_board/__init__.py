@@ -0,0 +1,88 @@
+import base64
+import os
+from functools import lru_cache
+
+import streamlit.components.v1 as components
+
+from games.maze import generate_maze
+from games.maze_render import BOARD_PIXELS
+from utils.media_server import media_url
+
+# The browser reports back after this many moves, or when the goal is reached
+MOVE_BATCH = 50
+
+STEPS = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
+
+_component = components.declare_component(
+    "maze_board",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend"),
+)
+
+
+def _dims(maze):
+    return (maze.shape[0] - 1) // 2, (maze.shape[1] - 1) // 2
+
+
+def maze_id(maze):
+    rows, cols = _dims(maze)
+    return f"{rows}x{cols}:{maze.seed}"
+
+
+# --------------------------------------------------
+# Component arguments (built once per maze)
+# --------------------------------------------------
+@lru_cache(maxsize=64)
+def _maze_args(rows, cols, seed):
+    maze = generate_maze(rows, cols, seed)
+    return {
+        "grid": ["".join(map(str, row)) for row in maze.grid.tolist()],
+        "dist": maze.dist.ravel().tolist(),
+        "start": list(maze.start),
+        "goal": list(maze.goal),
+    }
+
+
+@lru_cache(maxsize=128)
+def _data_url(image_path):
+    with open(image_path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode("ascii")
+    return f"data:image/jpeg;base64,{encoded}"
+
+
+def _target_url(image_path):
+    # A cacheable URL when the media endpoint is up; inlined otherwise
+    url = media_url(image_path)
+    return url if url != image_path else _data_url(image_path)
+
+
+def maze_board(maze, target_image=None, key=None):
+    """Render the maze in the browser and return its latest move report.
+
+    The report is ``{"maze", "seq", "moves", "done"}`` where ``moves`` is
+    the full string of U/D/L/R steps taken from ``maze.start``.
+    """
+    return _component(
+        maze_id=maze_id(maze),
+        board_pixels=BOARD_PIXELS,
+        batch=MOVE_BATCH,
+        target_image=_target_url(target_image) if target_image else None,
+        key=key,
+        default=None,
+        **_maze_args(*_dims(maze), maze.seed),
+    )
+
+
+# --------------------------------------------------
+# Server-side check of a reported move log
+# --------------------------------------------------
+def replay(maze, pos, moves):
+    """Apply ``moves`` from ``pos``; None if any step goes through a wall."""
+    r, c = pos
+    for step in moves:
+        if step not in STEPS:
+            return None
+        dr, dc = STEPS[step]
+        r, c = r + dr, c + dc
+        if not maze.is_open(r, c):
+            return None
+    return (r, c)
@@ -0,0 +1,100 @@
+import io
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageOps
+
+from games.maze import generate_maze
+
+# Board is always drawn at this size, whatever the maze dimensions
+BOARD_PIXELS = 480
+
+# Smallest size the child and target sprites are drawn at
+MIN_SPRITE_PIXELS = 24
+
+WALL_COLOR = (40, 40, 60)
+PATH_COLOR = (186, 160, 230)
+HINT_COLOR = (250, 210, 80)
+CHILD_COLOR = (255, 170, 60)
+CHILD_OUTLINE = (120, 60, 0)
+
+
+def _cell_pixels(shape):
+    return max(1, BOARD_PIXELS // max(shape))
+
+
+# --------------------------------------------------
+# Static layer (walls and paths), cached per maze
+# --------------------------------------------------
+@lru_cache(maxsize=64)
+def _static_layer(rows, cols, seed):
+    maze = generate_maze(rows, cols, seed)
+    cell = _cell_pixels(maze.shape)
+
+    palette = np.array([WALL_COLOR, PATH_COLOR], dtype=np.uint8)
+    pixels = palette[maze.grid]
+    pixels = np.repeat(np.repeat(pixels, cell, axis=0), cell, axis=1)
+    return Image.fromarray(pixels, "RGB")
+
+
+# --------------------------------------------------
+# Sprites
+# --------------------------------------------------
+@lru_cache(maxsize=128)
+def _target_sprite(image_path, size):
+    with Image.open(image_path) as img:
+        return ImageOps.fit(img.convert("RGB"), (size, size))
+
+
+def _sprite_box(pos, cell, size):
+    cx = pos[1] * cell + cell // 2
+    cy = pos[0] * cell + cell // 2
+    return (cx - size // 2, cy - size // 2)
+
+
+# --------------------------------------------------
+# Compose one frame
+# --------------------------------------------------
+@lru_cache(maxsize=512)
+def _render(rows, cols, seed, pos, target_image, show_path):
+    maze = generate_maze(rows, cols, seed)
+    cell = _cell_pixels(maze.shape)
+    sprite = max(cell, MIN_SPRITE_PIXELS)
+
+    frame = _static_layer(rows, cols, seed).copy()
+    draw = ImageDraw.Draw(frame)
+
+    if show_path:
+        for r, c in maze.shortest_path(pos)[1:-1]:
+            draw.rectangle(
+                (c * cell, r * cell, (c + 1) * cell - 1, (r + 1) * cell - 1),
+                fill=HINT_COLOR,
+            )
+
+    if target_image:
+        frame.paste(
+            _target_sprite(target_image, sprite),
+            _sprite_box(maze.goal, cell, sprite),
+        )
+
+    x, y = _sprite_box(pos, cell, sprite)
+    draw.ellipse(
+        (x + 1, y + 1, x + sprite - 2, y + sprite - 2),
+        fill=CHILD_COLOR, outline=CHILD_OUTLINE, width=max(1, sprite // 12),
+    )
+
+    buf = io.BytesIO()
+    frame.save(buf, "PNG", optimize=False)
+    return buf.getvalue()
+
+
+def render_board(maze, pos, target_image=None, show_path=False):
+    """Draw the whole board into one PNG.
+
+    ``target_image`` is a path to the target's thumbnail. Frames are cached
+    by maze, position and target, so revisiting a square costs nothing.
+    """
+    rows, cols = (maze.shape[0] - 1) // 2, (maze.shape[1] - 1) // 2
+    return _render(
+        rows, cols, maze.seed, tuple(pos), target_image, bool(show_path)
+    )
@@ -1,20 +1,47 @@
 import streamlit as st
-import json
-import os
-import random
-from PIL import Image
 
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
+from games.planner import take_round
+from games.recall import learner_for, next_round, progress, record_answer
+from utils.family_repository import load_family_data
+from utils.gallery import member_gallery, member_photo
+from utils.households import current_household
+from utils.kinship import kinship
+
+
+# --------------------------------------------------
+# Member card
+# --------------------------------------------------
+def _member_card(household, member, label):
+    member_photo(household, member, 140)
+    st.write(f"**{member['name']}**")
+    st.caption(label)
+
 
 # --------------------------------------------------
-# Load family data
+# Start a round with the members due for practice
 # --------------------------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+def _learner():
+    # Siblings on one household each keep their own progress
+    return learner_for(st.session_state.get("player_id"))
+
+
+def start_round(household, family):
+    # The session keeps member IDs only; members come from the shared store
+    # Members still being prepared (or whose photo failed) sit out
+    round_ids = [
+        m["id"]
+        for m in next_round(household, family.ready(), learner=_learner())
+    ]
+    # The due members come from the schedule, their shuffles from the plan
+    names, photos = take_round("meet", (), width=len(round_ids)).orders
+    st.session_state.start_game = True
+    st.session_state.selected_id = None
+    st.session_state.matched = set()
+    st.session_state.graded = set()
+    st.session_state.message = ""
+    st.session_state.name_order = [round_ids[i] for i in names]
+    st.session_state.photo_order = [round_ids[i] for i in photos]
+
 
 # --------------------------------------------------
 # Meet My Family Game Screen
@@ -25,7 +52,8 @@ def meet_my_family_screen(go_to):
     st.write("First, look at your family members. Then play the matching game 💙")
     st.markdown("---")
 
-    family = load_family_data()
+    household = current_household()
+    family = load_family_data(household)
 
     if not family:
         st.warning("No family members found. Please complete Family Setup first.")
@@ -42,27 +70,26 @@ def meet_my_family_screen(go_to):
     if not st.session_state.start_game:
         st.subheader("📸 My Family")
 
-        cols = st.columns(3)
-        for idx, member in enumerate(family):
-            with cols[idx % 3]:
-                img_path = os.path.join(IMAGE_FOLDER, member["image"])
-                if os.path.exists(img_path):
-                    st.image(Image.open(img_path), width=140)
-                st.write(f"**{member['name']}**")
-                st.caption(member["relationship"])
+        learned, due = progress(household, family.ready(), _learner())
+        st.caption(
+            f"⭐ {learned} of {len(family.ready())} learned · {due} to practise now"
+        )
+
+        # Relationships as the player would say them, when one is chosen
+        graph = kinship(household, family)
+        player = st.session_state.get("player_id")
+        member_gallery(
+            family, "meet_intro",
+            lambda member, idx: _member_card(
+                household, member, graph.label(player, member)
+            ),
+        )
 
         st.markdown("---")
-        if st.button("▶ Start Game"):
-            st.session_state.start_game = True
-            st.session_state.selected_name = None
-            st.session_state.matched = []
-            st.session_state.message = ""
-            st.session_state.shuffled_names = random.sample(
-                [m["name"] for m in family], len(family)
-            )
-            st.session_state.shuffled_photos = random.sample(
-                family, len(family)
-            )
+        if not family.ready():
+            st.info("⏳ Photos are still being prepared. Please check back soon.")
+        elif st.button("▶ Start Game"):
+            start_round(household, family)
             st.rerun()
 
         if st.button("⬅ Back to Home"):
@@ -75,11 +102,14 @@ def meet_my_family_screen(go_to):
     # --------------------------------------------------
     st.subheader("🎮 Match the Name to the Photo")
 
-    if "selected_name" not in st.session_state:
-        st.session_state.selected_name = None
+    if "selected_id" not in st.session_state:
+        st.session_state.selected_id = None
 
     if "matched" not in st.session_state:
-        st.session_state.matched = []
+        st.session_state.matched = set()
+
+    matched = st.session_state.matched
+    photos = family.pick(st.session_state.photo_order)
 
     col1, col2 = st.columns([1, 2])
 
@@ -89,17 +119,18 @@ def meet_my_family_screen(go_to):
     with col1:
         st.markdown("### 🏷 Names")
 
-        for name in st.session_state.shuffled_names:
+        for member in family.pick(st.session_state.name_order):
+            name = member["name"]
 
-            if name in st.session_state.matched:
+            if member["id"] in matched:
                 st.success(f"{name} ✓")
 
-            elif st.session_state.selected_name == name:
+            elif st.session_state.selected_id == member["id"]:
                 st.info(f"👉 {name}")
 
             else:
-                if st.button(name, key=f"name_{name}"):
-                    st.session_state.selected_name = name
+                if st.button(name, key=f"name_{member['id']}"):
+                    st.session_state.selected_id = member["id"]
                     st.session_state.message = ""
                     st.rerun()
 
@@ -109,23 +140,31 @@ def meet_my_family_screen(go_to):
     with col2:
         st.markdown("### 🖼 Photos")
 
-        for member in st.session_state.shuffled_photos:
-            img_path = os.path.join(IMAGE_FOLDER, member["image"])
-            if os.path.exists(img_path):
-                st.image(Image.open(img_path), width=160)
+        for member in photos:
+            member_photo(household, member, 160)
 
-            if member["name"] in st.session_state.matched:
+            if member["id"] in matched:
                 st.success("Matched ✅")
 
             else:
-                if st.button("Select Photo", key=f"photo_{member['name']}"):
-                    if st.session_state.selected_name == member["name"]:
-                        st.session_state.matched.append(member["name"])
+                if st.button("Select Photo", key=f"photo_{member['id']}"):
+                    selected = st.session_state.selected_id
+                    correct = selected == member["id"]
+                    if correct:
+                        matched.add(member["id"])
                         st.session_state.message = "Correct! 🎉"
                     else:
                         st.session_state.message = "Try again 🙂"
 
-                    st.session_state.selected_name = None
+                    # Only the first try at each name counts towards recall
+                    selected_member = family.get(selected)
+                    if selected_member and selected not in st.session_state.graded:
+                        st.session_state.graded.add(selected)
+                        record_answer(
+                            household, selected_member, correct, _learner()
+                        )
+
+                    st.session_state.selected_id = None
                     st.rerun()
 
     # -----------------------
@@ -137,31 +176,23 @@ def meet_my_family_screen(go_to):
     # --------------------------------------------------
     # Completion
     # --------------------------------------------------
-    if len(st.session_state.matched) == len(family):
+    if all(m["id"] in matched for m in photos):
         st.balloons()
         st.success("🎉 Great job! You matched everyone!")
 
-        if st.button("🔁 Play Again"):
-            for key in [
-                "start_game",
-                "shuffled_names",
-                "shuffled_photos",
-                "matched",
-                "selected_name",
-                "message",
-            ]:
-                if key in st.session_state:
-                    del st.session_state[key]
+        if st.button("🔁 Next Round"):
+            start_round(household, family)
             st.rerun()
 
     st.markdown("---")
     if st.button("⬅ Back to Home"):
         for key in [
             "start_game",
-            "shuffled_names",
-            "shuffled_photos",
+            "name_order",
+            "photo_order",
             "matched",
-            "selected_name",
+            "graded",
+            "selected_id",
             "message",
         ]:
             if key in st.session_state:
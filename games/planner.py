@@ -0,0 +1,192 @@
+import logging
+import secrets
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import streamlit as st
+
+# Rounds are planned in blocks: one seeded, vectorized pass draws the
+# targets, options, maze seeds and shuffles of PLAN_ROUNDS rounds, and a
+# round is then a row of the plan. Block b of a session comes from the
+# generator seeded with (session seed, b), so every round can be replayed
+# from the seed alone: open the app with ?seed=1234 to get the same games.
+PLAN_ROUNDS = 32
+
+# Targets come from a stream of their own per cycle of len(member_ids)
+# rounds, so the rotation runs on across block boundaries
+_CYCLE_STREAM = 1
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# Plans
+# --------------------------------------------------
+@dataclass(frozen=True, eq=False)
+class Plan:
+    targets: np.ndarray     # (rounds,) member IDs, -1 with no members
+    options: np.ndarray     # (rounds, options) member IDs, target included
+    maze_seeds: np.ndarray  # (rounds,)
+    orders: np.ndarray      # (rounds, 2, width) two shuffles of range(width)
+
+
+@dataclass(frozen=True)
+class Round:
+    number: int
+    target: object          # member ID, or None with no members
+    options: list
+    maze_seed: int
+    orders: tuple           # two shuffles of range(width)
+
+
+def _cycle(seed, n, cycle):
+    # Each cycle of n rounds is one shuffle of every member, drawn from its
+    # own stream so a block can be planned without the blocks before it
+    return np.random.default_rng([seed, cycle, _CYCLE_STREAM]).permutation(n)
+
+
+def _targets(seed, n, start, rounds):
+    # Target positions of rounds start .. start + rounds - 1. Over every n
+    # rounds from round 0 each member is the target once, and nobody is
+    # the target twice in a row, across blocks too
+    numbers = np.arange(start, start + rounds)
+    if n < 3:
+        # One or two members: the only fair order repeats cycle 0
+        return _cycle(seed, n, 0)[numbers % n]
+
+    first, last = start // n, (start + rounds - 1) // n
+    # The cycle before the first is drawn too, to check the seam into it
+    perms = np.stack([_cycle(seed, n, c) for c in range(max(first - 1, 0), last + 1)])
+    for c in range(1, len(perms)):
+        # Swapping the first two leaves a cycle's last member unchanged,
+        # so each seam depends on the two raw shuffles beside it only
+        if perms[c, 0] == perms[c - 1, -1]:
+            perms[c, [0, 1]] = perms[c, [1, 0]]
+    return perms[numbers // n - max(first - 1, 0), numbers % n]
+
+
+def _distractors(rng, targets, n, k, pools):
+    rounds = len(targets)
+    # Random keys per member; the k smallest win, the target never does
+    keys = rng.random((rounds, n))
+    keys[np.arange(rounds), targets] = 2.0
+    picked = np.argpartition(keys, k - 1, axis=1)[:, :k]
+
+    if pools is not None and pools.shape[1] >= k:
+        # Rounds whose target has a pool of candidates draw from it instead
+        pool = pools[targets]
+        keys = rng.random(pool.shape)
+        keys[pool < 0] = 2.0
+        chosen = np.take_along_axis(
+            pool, np.argpartition(keys, k - 1, axis=1)[:, :k], axis=1
+        )
+        usable = (pool >= 0).sum(axis=1) >= k
+        picked = np.where(usable[:, None], chosen, picked)
+    return picked
+
+
+def _pool_matrix(ids, neighbours):
+    """Candidate lists aligned with ``ids`` -> positions, -1 padded."""
+    position = {member_id: i for i, member_id in enumerate(ids)}
+    width = max((len(pool) for pool in neighbours), default=0)
+    pools = np.full((len(ids), width), -1, dtype=np.int64)
+    for row, pool in enumerate(neighbours):
+        cols = [position[m] for m in pool if m in position]
+        pools[row, :len(cols)] = cols
+    return pools
+
+
+@lru_cache(maxsize=64)
+def plan_rounds(seed, block, member_ids, n_options=1, neighbours=None, width=0):
+    """Block ``block`` of the rounds planned from ``seed``.
+
+    ``member_ids`` are the possible targets; each round offers the target
+    and ``n_options - 1`` others, drawn from the target's entry in
+    ``neighbours`` (candidate IDs aligned with ``member_ids``) when it has
+    enough of them. ``width`` sizes the two shuffles. Plans are shared
+    between sessions, so their arrays are read-only.
+    """
+    rng = np.random.default_rng([seed, block])
+    ids = np.array(member_ids, dtype=np.int64)
+    n = len(ids)
+    rounds = PLAN_ROUNDS
+
+    if n:
+        targets = _targets(seed, n, block * rounds, rounds)
+        k = min(n_options - 1, n - 1)
+        if k > 0:
+            pools = _pool_matrix(member_ids, neighbours) if neighbours else None
+            picked = _distractors(rng, targets, n, k, pools)
+            options = rng.permuted(
+                np.concatenate([targets[:, None], picked], axis=1), axis=1
+            )
+        else:
+            options = targets[:, None]
+        targets, options = ids[targets], ids[options]
+    else:
+        targets = np.full(rounds, -1, dtype=np.int64)
+        options = np.empty((rounds, 0), dtype=np.int64)
+
+    plan = Plan(
+        targets=targets,
+        options=options,
+        maze_seeds=rng.integers(2**31, size=rounds),
+        orders=rng.permuted(np.tile(np.arange(width), (rounds, 2, 1)), axis=2),
+    )
+    for array in (plan.targets, plan.options, plan.maze_seeds, plan.orders):
+        array.setflags(write=False)
+    return plan
+
+
+def _round(plan, number, member_ids):
+    row = number % PLAN_ROUNDS
+    target = int(plan.targets[row])
+    return Round(
+        number=number,
+        target=target if member_ids else None,
+        options=plan.options[row].tolist(),
+        maze_seed=int(plan.maze_seeds[row]),
+        orders=tuple(plan.orders[row].tolist()),
+    )
+
+
+def round_at(seed, number, member_ids, n_options=1, neighbours=None, width=0):
+    """Round ``number`` (counting from 0) of the plan drawn from ``seed``."""
+    plan = plan_rounds(
+        seed, number // PLAN_ROUNDS, tuple(member_ids), n_options, neighbours, width
+    )
+    return _round(plan, number, member_ids)
+
+
+# --------------------------------------------------
+# Session rounds
+# --------------------------------------------------
+def session_seed():
+    """This session's plan seed; ``?seed=`` in the URL replays a session."""
+    if "plan_seed" not in st.session_state:
+        seed = st.query_params.get("seed", "")
+        st.session_state.plan_seed = (
+            int(seed) if seed.isdigit() else secrets.randbits(32)
+        )
+        logger.debug("Session plan seed %d", st.session_state.plan_seed)
+    return st.session_state.plan_seed
+
+
+def take_round(game, member_ids, n_options=1, neighbours=None, width=0):
+    """The next planned round of ``game``; each call advances its counter."""
+    key = f"{game}_round"
+    number = st.session_state.get(key, 0)
+    st.session_state[key] = number + 1
+
+    # The session keeps the block it is playing through, so its next round
+    # never waits on the shared cache, which busy servers cycle through
+    args = (
+        session_seed(), number // PLAN_ROUNDS, tuple(member_ids),
+        n_options, neighbours, width,
+    )
+    current = st.session_state.get(f"{game}_plan")
+    if current is None or current[0] != args:
+        current = (args, plan_rounds(*args))
+        st.session_state[f"{game}_plan"] = current
+    return _round(current[1], number, member_ids)
@@ -0,0 +1,199 @@
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from utils.households import OPEN_HOUSEHOLDS
+
+# Progress is kept per player (the member chosen as "who is playing");
+# sessions without a player share this learner
+DEFAULT_LEARNER = "child"
+
+# Leitner boxes: seconds until a member in that box is due again. A right
+# answer moves a member up one box, a wrong one sends it back to box 1.
+DAY = 24 * 3600
+BOX_INTERVALS = (0, 60, 10 * 60, DAY, 3 * DAY, 7 * DAY, 21 * DAY)
+
+# Members in this box or above count as learned
+LEARNED_BOX = 3
+
+ROUND_SIZE = 4
+
+
+@dataclass
+class Recall:
+    box: int = 0
+    due: float = 0.0
+    reviews: int = 0
+    lapses: int = 0
+
+
+def member_key(member):
+    return str(member["id"])
+
+
+def learner_for(player_id):
+    """The learner whose progress a session with ``player_id`` uses."""
+    return DEFAULT_LEARNER if player_id is None else f"member:{player_id}"
+
+
+# --------------------------------------------------
+# Per-learner schedule (priority queue by due time)
+# --------------------------------------------------
+class _Schedule:
+    def __init__(self, conn, learner):
+        self._conn = conn
+        self.learner = learner
+        self.state = {}
+        self._heap = []
+        self._family = None
+        self._members = {}
+
+        for key, box, due, reviews, lapses in conn.execute(
+            "SELECT member, box, due, reviews, lapses FROM recall"
+            " WHERE learner = ?",
+            (learner,),
+        ):
+            self.state[key] = Recall(box, due, reviews, lapses)
+
+    def _sync(self, family):
+        # The repository hands out one tuple per family version, so the
+        # queue is only rebuilt after members are added or removed
+        if family is self._family:
+            return
+        self._family = family
+        self._members = {member_key(m): m for m in family}
+        for key in self._members:
+            self.state.setdefault(key, Recall())
+        self._rebuild()
+
+    def _rebuild(self):
+        self._heap = [(self.state[key].due, key) for key in self._members]
+        heapq.heapify(self._heap)
+
+    def _pop(self):
+        # Entries left behind by earlier answers are skipped, not removed
+        while self._heap:
+            due, key = heapq.heappop(self._heap)
+            if self.state[key].due == due:
+                return due, key
+        return None
+
+    def next_round(self, family, size):
+        self._sync(family)
+        picked = []
+        while len(picked) < size:
+            entry = self._pop()
+            if entry is None:
+                break
+            picked.append(entry)
+        for entry in picked:
+            heapq.heappush(self._heap, entry)
+        return [self._members[key] for _, key in picked]
+
+    def record(self, member, correct, now):
+        key = member_key(member)
+        recall = self.state.setdefault(key, Recall())
+        recall.reviews += 1
+        if correct:
+            recall.box = min(recall.box + 1, len(BOX_INTERVALS) - 1)
+        else:
+            recall.box = 1
+            recall.lapses += 1
+        recall.due = now + BOX_INTERVALS[recall.box]
+
+        if key in self._members:
+            heapq.heappush(self._heap, (recall.due, key))
+            # Drop superseded entries once they outnumber the live ones
+            if len(self._heap) > 2 * len(self._members):
+                self._rebuild()
+        self._conn.execute(
+            "INSERT INTO recall (learner, member, box, due, reviews, lapses)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (learner, member) DO UPDATE SET"
+            " box = excluded.box, due = excluded.due,"
+            " reviews = excluded.reviews, lapses = excluded.lapses",
+            (self.learner, key, recall.box, recall.due,
+             recall.reviews, recall.lapses),
+        )
+
+    def progress(self, family, now):
+        self._sync(family)
+        learned = due = 0
+        for key in self._members:
+            recall = self.state[key]
+            learned += recall.box >= LEARNED_BOX
+            due += recall.due <= now
+        return learned, due
+
+
+# --------------------------------------------------
+# Progress store (one SQLite file per household)
+# --------------------------------------------------
+# Like the member stores, only recently used households stay open; an
+# evicted household's schedules are reloaded from its file when needed
+_lock = threading.Lock()
+_connections = OrderedDict()   # household root -> connection
+_schedules = {}
+
+
+def _connect(household):
+    os.makedirs(household.root, exist_ok=True)
+    conn = sqlite3.connect(
+        household.progress_db, timeout=30,
+        check_same_thread=False, isolation_level=None,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS recall ("
+        " learner TEXT NOT NULL,"
+        " member TEXT NOT NULL,"
+        " box INTEGER NOT NULL,"
+        " due REAL NOT NULL,"
+        " reviews INTEGER NOT NULL,"
+        " lapses INTEGER NOT NULL,"
+        " PRIMARY KEY (learner, member)) WITHOUT ROWID"
+    )
+    return conn
+
+
+def _schedule_for(household, learner):
+    # Callers hold _lock
+    root = household.root
+    if root in _connections:
+        _connections.move_to_end(root)
+    else:
+        _connections[root] = _connect(household)
+        while len(_connections) > OPEN_HOUSEHOLDS:
+            old_root, conn = _connections.popitem(last=False)
+            conn.close()
+            for key in [k for k in _schedules if k[0] == old_root]:
+                del _schedules[key]
+
+    key = (root, learner)
+    if key not in _schedules:
+        _schedules[key] = _Schedule(_connections[root], learner)
+    return _schedules[key]
+
+
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+def next_round(household, family, size=ROUND_SIZE, learner=DEFAULT_LEARNER):
+    """The ``size`` members due soonest (new members are due at once)."""
+    with _lock:
+        return _schedule_for(household, learner).next_round(family, size)
+
+
+def record_answer(household, member, correct, learner=DEFAULT_LEARNER):
+    with _lock:
+        _schedule_for(household, learner).record(member, correct, time.time())
+
+
+def progress(household, family, learner=DEFAULT_LEARNER):
+    """``(learned, due_now)`` member counts for the progress line."""
+    with _lock:
+        return _schedule_for(household, learner).progress(family, time.time())
@@ -1,22 +1,48 @@
 import streamlit as st
-import json
-import os
-import random
-from PIL import Image
 
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
-AUDIO_FOLDER = "data/audio"
+from games.planner import take_round
+from utils.audio import audio_path
+from utils.family_repository import load_family_data
+from utils.gallery import member_gallery, member_photo
+from utils.households import current_household
+from utils.kinship import kinship
+from utils.media_server import media_url
+from utils.voice_features import DIFFICULTIES, voice_index
+
+DIFFICULTY_LABELS = {
+    "easy": "🙂 Easy (very different voices)",
+    "normal": "😀 Normal",
+    "hard": "🤓 Hard (similar voices)",
+}
+
+# Wrong answers shown next to the right one
+DISTRACTORS = 2
+
+
+def voice_pools(household, family, voice_ids, difficulty):
+    """Distractor candidates per voice: similar voices on hard, very
+    different ones on easy, anyone (None) on normal."""
+    if difficulty == "normal":
+        return None
+    # A slightly wider pool than needed so rounds are not all identical
+    table = voice_index(household, family).neighbour_table(
+        DISTRACTORS + 1, farthest=difficulty == "easy"
+    )
+    return tuple(table.get(member_id, ()) for member_id in voice_ids)
 
 
 # --------------------------------------------------
-# Load family data
+# Member card
 # --------------------------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+def _member_card(household, member, label):
+    member_photo(household, member, 150)
+
+    st.write(f"**{member['name']}**")
+    st.write(label)
+
+    audio = audio_path(household, member["audio"], "preview")
+    if audio:
+        st.audio(media_url(audio))
 
 
 # --------------------------------------------------
@@ -41,10 +67,11 @@ def who_is_speaking_screen(go_to):
     st.write("Listen carefully and find whose voice it is 💙")
     st.markdown("---")
 
-    family = load_family_data()
+    household = current_household()
+    family = load_family_data(household)
 
-    # Filter only members with audio
-    family_with_audio = [m for m in family if m.get("audio")]
+    # Members with a voice ready to play (an index read, not a scan)
+    family_with_audio = family.with_audio()
 
     if len(family_with_audio) < 2:
         st.warning("Please add at least 2 family members with voice recordings.")
@@ -64,22 +91,31 @@ def who_is_speaking_screen(go_to):
     if st.session_state.ws_stage == "intro":
         st.subheader("👨‍👩‍👧 Listen to Your Family")
 
-        cols = st.columns(3)
-        for idx, member in enumerate(family_with_audio):
-            with cols[idx % 3]:
-                img = os.path.join(IMAGE_FOLDER, member["image"])
-                if os.path.exists(img):
-                    st.image(Image.open(img), width=150)
-
-                st.write(f"**{member['name']}**")
-                st.write(member["relationship"])
+        graph = kinship(household, family)
+        player = st.session_state.get("player_id")
 
-                audio = os.path.join(AUDIO_FOLDER, member["audio"])
-                if os.path.exists(audio):
-                    st.audio(audio)
+        # Only the visible page loads its voices
+        member_gallery(
+            family_with_audio, "ws_intro",
+            lambda member, idx: _member_card(
+                household, member, graph.label(player, member)
+            ),
+        )
 
         st.markdown("---")
 
+        # Kept outside the widget key so the choice survives the game stage
+        difficulty = st.session_state.get("ws_difficulty", "normal")
+        choice = st.radio(
+            "Difficulty",
+            DIFFICULTIES,
+            index=DIFFICULTIES.index(difficulty),
+            format_func=DIFFICULTY_LABELS.get,
+            horizontal=True,
+            key="ws_difficulty_choice",
+        )
+        st.session_state.ws_difficulty = choice
+
         if st.button("▶ Start Game"):
             st.session_state.ws_stage = "game"
             st.rerun()
@@ -92,38 +128,42 @@ def who_is_speaking_screen(go_to):
     # --------------------------------------------------
     # STAGE 2: Game Mode
     # --------------------------------------------------
+    # The session keeps member IDs only; members come from the shared store
     if "ws_target" not in st.session_state:
-        st.session_state.ws_target = random.choice(family_with_audio)
-
-        # Pick up to 3 options
-        options = family_with_audio.copy()
-        random.shuffle(options)
-        st.session_state.ws_options = options[:3]
-
-        # Ensure target is included
-        if st.session_state.ws_target not in st.session_state.ws_options:
-            st.session_state.ws_options[-1] = st.session_state.ws_target
-            random.shuffle(st.session_state.ws_options)
-
-    target = st.session_state.ws_target
+        # Rounds come from the session's plan; starting one is an index step
+        voice_ids = [m["id"] for m in family_with_audio]
+        planned = take_round(
+            "ws", voice_ids, DISTRACTORS + 1,
+            voice_pools(
+                household, family, voice_ids,
+                st.session_state.get("ws_difficulty", "normal"),
+            ),
+        )
+        st.session_state.ws_target = planned.target
+        st.session_state.ws_options = planned.options
+
+    target = family.get(st.session_state.ws_target)
+    options = family.pick(st.session_state.ws_options)
+    if target is None:
+        # The target was deleted mid-game
+        reset_who_speaking()
+        st.rerun()
 
     st.subheader("🎧 Whose voice is this?")
-    st.audio(os.path.join(AUDIO_FOLDER, target["audio"]))
+    st.audio(media_url(audio_path(household, target["audio"])))
 
     st.markdown("🔁 You can replay the voice as many times as you want")
 
     st.markdown("---")
 
-    cols = st.columns(len(st.session_state.ws_options))
+    cols = st.columns(len(options))
 
-    for idx, member in enumerate(st.session_state.ws_options):
+    for idx, member in enumerate(options):
         with cols[idx]:
-            img = os.path.join(IMAGE_FOLDER, member["image"])
-            if os.path.exists(img):
-                st.image(Image.open(img), width=150)
+            member_photo(household, member, 150)
 
-            if st.button(member["name"], key=f"choose_{member['name']}"):
-                if member == target:
+            if st.button(member["name"], key=f"choose_{member['id']}"):
+                if member["id"] == target["id"]:
                     st.balloons()
                     st.success("🎉 Correct! Great listening!")
                 else:
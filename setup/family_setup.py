@@ -1,33 +1,133 @@
-import streamlit as st
-import json
 import os
-from PIL import Image
 
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
-AUDIO_FOLDER = "data/audio"
+import streamlit as st
+
+from utils.archive import EXPORT_FORMATS, export_archive, export_path, import_archive
+from utils.audio import audio_path
+from utils.family_repository import add_member, delete_member, load_family_data
+from utils.gallery import member_gallery, member_photo
+from utils.households import current_household
+from utils.integrity import is_missing
+from utils.kinship import MAX_PARENTS, kinship, link_members
+from utils.media_server import media_url
+from utils.media_store import collect_garbage, release, replacing, store_upload
+from utils.member_store import FAILED, PROCESSING, is_ready
+from utils.upload_queue import pending, resume, submit
 
 # --------------------------------------------------
-# Ensure folders exist
+# Member card
 # --------------------------------------------------
-os.makedirs(IMAGE_FOLDER, exist_ok=True)
-os.makedirs(AUDIO_FOLDER, exist_ok=True)
+def _member_card(household, member):
+    member_photo(household, member, 150)
+
+    st.write(f"**{member['name']}**")
+    st.write(member["relationship"])
+
+    if member.get("status") == PROCESSING:
+        st.caption("⏳ Preparing photo and voice...")
+    elif member.get("status") == FAILED:
+        st.caption("⚠️ Photo could not be read; please re-add this person.")
+    elif is_missing(household, "image", member["image"]):
+        st.caption("⚠️ Photo file is missing; please re-add this person.")
+
+    if member.get("audio") and is_ready(member):
+        if is_missing(household, "audio", member["audio"]):
+            st.caption("⚠️ Voice file is missing.")
+        else:
+            audio = audio_path(household, member["audio"], "preview")
+            if audio:
+                st.audio(media_url(audio))
+
+    if st.button("🗑️ Delete", key=f"delete_{member['id']}"):
+        delete_member(member["id"], household)
+
+        # Reclaim media no other member still uses
+        remaining = load_family_data(household)
+        for field in ("image", "audio"):
+            release(household, field, member.get(field), remaining)
+        st.rerun()
+
 
 # --------------------------------------------------
-# Load existing family data
+# Family tree editor
 # --------------------------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+GENDERS = (None, "female", "male")
+
+
+def _family_tree(household, family):
+    st.caption(
+        "Link parents and partners so the games can say how everyone is "
+        "related to the person playing."
+    )
+    graph = kinship(household, family)
+
+    def name_of(member_id):
+        return family.get(member_id)["name"]
+
+    # Kept outside the widget key so the games can read it on every page
+    player = st.session_state.get("player_id")
+    player = st.selectbox(
+        "Who is playing on this device?",
+        (None,) + family.ids,
+        index=((None,) + family.ids).index(player) if player in family.ids else 0,
+        format_func=lambda i: "Nobody in particular" if i is None else name_of(i),
+        key="tree_player",
+    )
+    st.session_state.player_id = player
+
+    member_id = st.selectbox(
+        "Person", family.ids, format_func=name_of, key="tree_member"
+    )
+    member = family.get(member_id)
+    others = [i for i in family.ids if i != member_id]
+
+    with st.form(f"tree_form_{member_id}"):
+        gender = st.selectbox(
+            "Gender (for words like mother or uncle)",
+            GENDERS,
+            index=GENDERS.index(member.get("gender")) if member.get("gender") in GENDERS else 0,
+            format_func=lambda g: g or "Not set",
+        )
+        parents = st.multiselect(
+            "Parents", others,
+            # A list saved before the limit keeps its first parents here
+            default=[
+                p for p in member.get("parents") or () if p in family.ids
+            ][:MAX_PARENTS],
+            format_func=name_of, max_selections=MAX_PARENTS,
+        )
+        spouses = st.multiselect(
+            "Spouse or partner", others,
+            default=list(graph.relatives(member_id, "spouse")),
+            format_func=name_of,
+        )
+        if st.form_submit_button("Save links"):
+            try:
+                link_members(household, family, member_id, gender, parents, spouses)
+            except ValueError as exc:
+                st.error(str(exc))
+            else:
+                st.rerun()
+
+    if player is not None and player != member_id:
+        kin = graph.describe(player, member_id)
+        st.caption(
+            f"{name_of(player)} calls {member['name']}: **{kin}**" if kin
+            else f"{member['name']} is not a close relative of {name_of(player)} yet."
+        )
+
 
 # --------------------------------------------------
-# Save family data
+# Upload progress (polls without rerunning the page)
 # --------------------------------------------------
-def save_family_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+@st.fragment(run_every=1.0)
+def _processing_notice(household):
+    count = pending(household)
+    if count == 0:
+        # Every job has saved its results; redraw the cards once
+        st.rerun(scope="app")
+    st.info(f"⏳ Preparing {count} new upload(s) in the background...")
+
 
 # --------------------------------------------------
 # Family Setup Screen
@@ -38,9 +138,16 @@ def family_setup_screen(go_to):
     st.write("Add, review, or remove family members used in the games.")
     st.markdown("---")
 
-    # Initialize family members
-    if "family_members" not in st.session_state:
-        st.session_state.family_members = load_family_data()
+    household = current_household()
+
+    # Members come from the shared store on every run; the session only
+    # remembers that it has already swept orphaned media
+    family = load_family_data(household)
+
+    if "media_swept" not in st.session_state:
+        # Sweep media orphaned by earlier edits or crashed uploads
+        collect_garbage(household, family)
+        st.session_state.media_swept = True
 
     # Form reset key
     if "form_counter" not in st.session_state:
@@ -68,61 +175,156 @@ def family_setup_screen(go_to):
             if not name or not relationship or not image_file:
                 st.warning("Please enter name, relationship, and upload photo.")
             else:
-                # Save image
-                image_path = os.path.join(IMAGE_FOLDER, image_file.name)
-                with open(image_path, "wb") as f:
-                    f.write(image_file.getbuffer())
-
-                # Save audio if provided
+                # Only the originals are written here; thumbnails, voice
+                # renditions and metadata are prepared by the upload queue
+                image_filename = store_upload(image_file, household.image_folder)
                 audio_filename = None
                 if audio_file:
-                    audio_filename = audio_file.name
-                    audio_path = os.path.join(AUDIO_FOLDER, audio_filename)
-                    with open(audio_path, "wb") as f:
-                        f.write(audio_file.getbuffer())
+                    audio_filename = store_upload(
+                        audio_file, household.audio_folder
+                    )
 
                 # Add member
-                st.session_state.family_members.append({
+                member = {
                     "name": name,
                     "relationship": relationship,
-                    "image": image_file.name,
-                    "audio": audio_filename
-                })
-
-                save_family_data(st.session_state.family_members)
-                st.success(f"{name} added successfully!")
+                    "image": image_filename,
+                    "audio": audio_filename,
+                    "status": PROCESSING,
+                }
+                member["id"] = add_member(member, household)
+                submit(household, member)
+                st.success(f"{name} added! Their photo and voice are being prepared.")
 
                 # ✅ RESET FORM + REFRESH UI
                 st.session_state.form_counter += 1
                 st.rerun()
 
+    # -------------------------------
+    # Bulk Import / Export
+    # -------------------------------
+    with st.expander("📦 Import or export a whole family"):
+        st.caption(
+            "An archive holds manifest.json plus the photos and voices it lists."
+        )
+        archive_file = st.file_uploader(
+            "Family archive",
+            type=["zip", "tar", "gz", "tgz"],
+            key=f"archive_{st.session_state.form_counter}",
+        )
+        if archive_file and st.button("📥 Import Family"):
+            bar = st.progress(0.0, text="Starting import...")
+            try:
+                result = import_archive(
+                    household, archive_file,
+                    progress=lambda fraction, text: bar.progress(fraction, text=text),
+                )
+            except ValueError as exc:
+                st.error(f"Could not import this archive: {exc}")
+            else:
+                st.session_state.import_report = (
+                    result.added, result.skipped, result.warnings
+                )
+                st.session_state.form_counter += 1
+                st.rerun()
+
+        # Shown once, on the run after an import
+        report = st.session_state.pop("import_report", None)
+        if report:
+            added, skipped, warnings = report
+            st.success(f"Imported {added} family members.")
+            for line in skipped:
+                st.warning(f"Skipped {line}")
+            for line in warnings:
+                st.info(line)
+
+        if family:
+            fmt = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True)
+            if st.button("📤 Prepare Export"):
+                path = export_path(household, fmt)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with replacing(path) as f:
+                    export_archive(household, f, fmt)
+
+                # Offered only on the run that built it, so later reruns of
+                # this page never read the archive again; downloading does
+                # not rerun the page
+                with open(path, "rb") as f:
+                    st.download_button(
+                        "⬇ Download archive", f,
+                        file_name=os.path.basename(path), on_click="ignore",
+                    )
+
+            st.markdown("---")
+            st.caption(
+                "The offline game pack plays all three games in a browser, "
+                "from a folder or any static web host, without this server."
+            )
+            if st.button("🎮 Prepare Offline Game Pack"):
+                # The games and their media libraries load only when packing
+                from games.game_pack import (
+                    build_game_pack, pack_archive_path, pack_folder, pack_lock,
+                    write_pack_archive,
+                )
+
+                folder = pack_folder(household)
+                path = pack_archive_path(household)
+                # Another session's build must not change the pack mid-zip
+                with st.spinner("Packing photos and voices..."), pack_lock(folder):
+                    build_game_pack(
+                        household, player=st.session_state.get("player_id")
+                    )
+                    with replacing(path) as f:
+                        write_pack_archive(folder, f)
+
+                # Like the export, offered only on the run that built it
+                with open(path, "rb") as f:
+                    st.download_button(
+                        "⬇ Download game pack", f,
+                        file_name=os.path.basename(path), on_click="ignore",
+                    )
+
+    # -------------------------------
+    # Family Tree Links
+    # -------------------------------
+    if family:
+        with st.expander("🌳 Family tree"):
+            _family_tree(household, family)
+
     st.markdown("---")
 
     # -------------------------------
     # Display Added Members
     # -------------------------------
-    if st.session_state.family_members:
+    if family:
         st.subheader("Added Family Members")
 
-        cols = st.columns(3)
-        for idx, member in enumerate(st.session_state.family_members):
-            with cols[idx % 3]:
-                img_path = os.path.join(IMAGE_FOLDER, member["image"])
-                if os.path.exists(img_path):
-                    st.image(Image.open(img_path), width=150)
+        if family.processing():
+            # Picks up jobs lost to a restart; queued members are skipped
+            resume(household, family.processing())
+            _processing_notice(household)
 
-                st.write(f"**{member['name']}**")
-                st.write(member["relationship"])
+        # Filters are index reads on the shared store
+        search_col, relation_col = st.columns(2)
+        with search_col:
+            prefix = st.text_input("🔍 Name starts with", key="setup_search")
+        with relation_col:
+            relationship = st.selectbox(
+                "Relationship", ("All",) + family.relationships,
+                key="setup_relationship",
+            )
 
-                if member.get("audio"):
-                    audio_path = os.path.join(AUDIO_FOLDER, member["audio"])
-                    if os.path.exists(audio_path):
-                        st.audio(audio_path)
+        shown = family.with_prefix(prefix) if prefix else family
+        if relationship != "All":
+            related = {m["id"] for m in family.by_relationship(relationship)}
+            shown = [m for m in shown if m["id"] in related]
 
-                if st.button("🗑️ Delete", key=f"delete_{idx}"):
-                    st.session_state.family_members.pop(idx)
-                    save_family_data(st.session_state.family_members)
-                    st.rerun()
+        if not shown:
+            st.info("No family members match.")
+        member_gallery(
+            shown, "setup",
+            lambda member, idx: _member_card(household, member),
+        )
 
     st.markdown("---")
 
@@ -132,7 +334,7 @@ def family_setup_screen(go_to):
     col1, col2 = st.columns(2)
 
     with col1:
-        if st.session_state.family_members:
+        if family:
             if st.button("✅ Finish Setup"):
                 go_to("home")
                 st.rerun()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import streamlit as st
+
+from games.planner import PLAN_ROUNDS, plan_rounds, round_at, take_round
+
+SEEDS = range(200)
+BLOCKS = 3
+
+
+def _targets(seed, ids, blocks=BLOCKS):
+    return np.concatenate([
+        plan_rounds.__wrapped__(seed, block, tuple(ids)).targets
+        for block in range(blocks)
+    ])
+
+
+@pytest.mark.parametrize("n", [2, 3, 5, 31, 32, 33, 40])
+def test_no_target_twice_in_a_row(n):
+    ids = range(100, 100 + n)
+    for seed in SEEDS:
+        targets = _targets(seed, ids)
+        repeats = np.flatnonzero(targets[1:] == targets[:-1])
+        assert not repeats.size, f"seed {seed}: repeat after round {repeats[0]}"
+
+
+@pytest.mark.parametrize("n", [2, 3, 5, 32, 40, 70])
+def test_each_member_once_per_cycle(n):
+    ids = list(range(100, 100 + n))
+    blocks = max(BLOCKS, -(-2 * n // PLAN_ROUNDS))
+    for seed in range(20):
+        targets = _targets(seed, ids, blocks)
+        for start in range(0, len(targets) - n + 1, n):
+            assert sorted(targets[start:start + n].tolist()) == ids
+
+
+def test_rounds_replay_from_the_seed():
+    ids = (4, 8, 15, 16, 23, 42)
+    first = [round_at(7, i, ids, 3) for i in range(2 * PLAN_ROUNDS)]
+    plan_rounds.cache_clear()
+    again = [round_at(7, i, ids, 3) for i in range(2 * PLAN_ROUNDS)]
+    assert first == again
+    for planned in first:
+        assert planned.target in planned.options
+        assert len(set(planned.options)) == 3
+
+
+def test_session_keeps_its_block_when_the_cache_is_cleared():
+    ids = (4, 8, 15, 16, 23, 42)
+    st.session_state.clear()
+    st.session_state.plan_seed = 7
+    rounds = [take_round("test", ids, 3)]
+    plan_rounds.cache_clear()
+    rounds += [take_round("test", ids, 3) for _ in range(PLAN_ROUNDS - 1)]
+    # The rest of the block came from the session, not the shared cache
+    assert plan_rounds.cache_info().currsize == 0
+    rounds += [take_round("test", ids, 3) for _ in range(PLAN_ROUNDS)]
+    assert rounds == [round_at(7, i, ids, 3) for i in range(2 * PLAN_ROUNDS)]
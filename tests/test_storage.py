@@ -0,0 +1,49 @@
+import pytest
+
+from utils.storage import JsonBackend, SqliteBackend
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "json":
+        backend = JsonBackend(str(tmp_path / "family_data.json"))
+    else:
+        backend = SqliteBackend(str(tmp_path / "family.db"))
+    yield backend
+    backend.close()
+
+
+def _member(name, **fields):
+    return dict(name=name, relationship="x", image=f"{name}.jpg", **fields)
+
+
+def test_deleted_ids_are_never_reused(backend):
+    backend.add_member(_member("Kid"))
+    gran = backend.add_member(_member("Gran"))
+    backend.delete_member(gran)
+    stranger = backend.add_member(_member("Stranger"))
+    assert stranger > gran
+
+
+def test_ids_survive_a_reopen(backend):
+    backend.add_member(_member("Kid"))
+    gran = backend.add_member(_member("Gran"))
+    backend.delete_member(gran)
+    reopened = type(backend)(backend.path)
+    assert reopened.add_member(_member("Stranger")) > gran
+
+
+def test_delete_removes_links_to_the_member(backend):
+    gran = backend.add_member(_member("Gran"))
+    grandpa = backend.add_member(_member("Grandpa", spouses=[gran]))
+    mum = backend.add_member(_member("Mum", parents=[gran, grandpa]))
+    kid = backend.add_member(_member("Kid", parents=[mum]))
+    backend.update_members({gran: {"spouses": [grandpa]}})
+
+    backend.delete_member(gran)
+
+    members = {m["id"]: m for m in backend.load()}
+    assert gran not in members
+    assert members[grandpa]["spouses"] == []
+    assert members[mum]["parents"] == [grandpa]
+    assert members[kid]["parents"] == [mum]
@@ -0,0 +1,308 @@
+import io
+import json
+import multiprocessing
+import os
+import posixpath
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from utils.audio import ingest_audio
+from utils.family_repository import add_members, load_family_data, update_members
+from utils.kinship import MAX_PARENTS
+from utils.media_meta import audio_metadata, image_metadata
+from utils.media_store import store_upload
+from utils.thumbnails import create_thumbnails
+
+# Archive layout:
+#   manifest.json  {"version": 1, "members": [{"name", "relationship",
+#                                              "image", "audio", "gender",
+#                                              "parents", "spouses"}]}
+#                  (parents/spouses are positions in "members"; optional)
+#   photos/...     member photos, referenced from the manifest by path
+#   voices/...     member voices, referenced from the manifest by path
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+# Larger entries are skipped rather than stored
+MAX_ENTRY_BYTES = 64 * 1024 * 1024
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+EXPORT_FORMATS = {"zip": ".zip", "tar.gz": ".tar.gz"}
+
+
+@dataclass
+class ImportResult:
+    added: int = 0
+    skipped: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+
+# --------------------------------------------------
+# Streaming archive entries
+# --------------------------------------------------
+class _Entry:
+    """A non-seekable view of one archive entry, so it is stored in one pass."""
+
+    def __init__(self, raw, name):
+        self._raw = raw
+        self.name = name
+
+    def read(self, size=-1):
+        return self._raw.read(size)
+
+    def seekable(self):
+        return False
+
+
+def _normalise(path):
+    return posixpath.normpath(path) if path else path
+
+
+def _entries(fileobj):
+    """Yield ``(path, size, stream, fraction_read)`` for every file entry."""
+    try:
+        yield from _archive_entries(fileobj)
+    except (zipfile.BadZipFile, tarfile.TarError) as exc:
+        raise ValueError(f"Not a readable zip or tar archive ({exc})") from exc
+
+
+def _archive_entries(fileobj):
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as zf:
+            infos = [i for i in zf.infolist() if not i.is_dir()]
+            for n, info in enumerate(infos, 1):
+                with zf.open(info) as raw:
+                    yield info.filename, info.file_size, raw, n / len(infos)
+        return
+
+    total = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(0)
+    # "r|*" reads the (possibly compressed) tar front to back, one entry at
+    # a time, without random access
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for info in tar:
+            if not info.isfile():
+                continue
+            raw = tar.extractfile(info)
+            fraction = fileobj.tell() / total if total else 0.0
+            yield info.name, info.size, raw, min(fraction, 1.0)
+
+
+# --------------------------------------------------
+# Worker tasks (run in the process pool)
+# --------------------------------------------------
+def _process_photo(household, filename):
+    from PIL import Image
+
+    path = os.path.join(household.image_folder, filename)
+    try:
+        with Image.open(path) as img:
+            img.verify()
+        create_thumbnails(household, filename)
+        meta = image_metadata(path)
+    except Exception as exc:
+        return "image", filename, f"unreadable photo ({exc})", None
+    return "image", filename, None, meta
+
+
+def _process_voice(household, filename):
+    meta = audio_metadata(os.path.join(household.audio_folder, filename))
+    if not ingest_audio(household, filename):
+        return (
+            "audio", filename, "voice could not be decoded; kept as uploaded", meta
+        )
+    return "audio", filename, None, meta
+
+
+def _pool():
+    # Streamlit serves sessions from threads; spawn keeps workers clean
+    return ProcessPoolExecutor(
+        max_workers=MAX_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# --------------------------------------------------
+# Import
+# --------------------------------------------------
+def import_archive(household, fileobj, progress=None):
+    """Add every member of a family archive to ``household``.
+
+    Entries are streamed into the media store one at a time, while a
+    process pool validates photos, renders thumbnails and processes voices.
+    All new members are saved in a single write at the end. ``progress``
+    is called as ``progress(fraction, text)``.
+    """
+    progress = progress or (lambda fraction, text: None)
+    result = ImportResult()
+    stored = {}   # archive path -> (field, stored filename)
+    manifest = None
+    futures = []
+
+    with _pool() as pool:
+        submitted = set()
+        for path, size, raw, fraction in _entries(fileobj):
+            path = _normalise(path)
+            progress(0.5 * fraction, f"Reading {path}")
+            ext = os.path.splitext(path)[1].lower()
+
+            if os.path.basename(path) == MANIFEST_NAME:
+                manifest = json.load(raw)
+                continue
+            if size > MAX_ENTRY_BYTES:
+                result.warnings.append(f"{path}: larger than the size limit")
+                continue
+            if ext in IMAGE_EXTENSIONS:
+                media_field, folder, task = "image", household.image_folder, _process_photo
+            elif ext in AUDIO_EXTENSIONS:
+                media_field, folder, task = "audio", household.audio_folder, _process_voice
+            else:
+                continue
+
+            filename = store_upload(_Entry(raw, path), folder)
+            stored[path] = (media_field, filename)
+            if (media_field, filename) not in submitted:
+                submitted.add((media_field, filename))
+                futures.append(pool.submit(task, household, filename))
+
+        if manifest is None or manifest.get("version") != MANIFEST_VERSION:
+            # Stored files are left for the media garbage collector
+            raise ValueError("Not a family archive (missing or unknown manifest)")
+
+        failed = {}
+        metadata = {}
+        for done, future in enumerate(as_completed(futures), 1):
+            media_field, filename, error, meta = future.result()
+            if error:
+                failed[(media_field, filename)] = error
+            metadata[(media_field, filename)] = meta
+            progress(0.5 + 0.5 * done / len(futures), "Preparing photos and voices")
+
+    members = []
+    positions = []   # manifest position of each member added
+    for position, entry in enumerate(manifest.get("members", [])):
+        label = entry.get("name") or "(unnamed)"
+        image = stored.get(_normalise(entry.get("image")))
+        audio = stored.get(_normalise(entry.get("audio")))
+
+        if not entry.get("name") or not entry.get("relationship"):
+            result.skipped.append(f"{label}: name and relationship are required")
+            continue
+        if image is None or image[0] != "image":
+            result.skipped.append(f"{label}: photo missing from archive")
+            continue
+        if image in failed:
+            result.skipped.append(f"{label}: {failed[image]}")
+            continue
+        if entry.get("audio") and (audio is None or audio[0] != "audio"):
+            result.warnings.append(f"{label}: voice missing from archive")
+            audio = None
+        elif audio in failed:
+            result.warnings.append(f"{label}: {failed[audio]}")
+
+        member = {
+            "name": entry["name"],
+            "relationship": entry["relationship"],
+            "image": image[1],
+            "audio": audio[1] if audio else None,
+            "image_meta": metadata[image],
+        }
+        if audio:
+            member["audio_meta"] = metadata[audio]
+        if entry.get("gender") in ("female", "male"):
+            member["gender"] = entry["gender"]
+        members.append(member)
+        positions.append(position)
+
+    if members:
+        # Only the new rows are written, so members other sessions add or
+        # update meanwhile are left alone
+        new_ids = add_members(members, household)
+        _link_imported(
+            household, manifest["members"], positions, new_ids, result
+        )
+    result.added = len(members)
+    progress(1.0, f"Imported {result.added} family members")
+    return result
+
+
+def _link_imported(household, entries, positions, new_ids, result):
+    id_at = dict(zip(positions, new_ids))
+
+    def ids(refs):
+        return [id_at[r] for r in refs or () if isinstance(r, int) and r in id_at]
+
+    updates = {}
+    for position, member_id in id_at.items():
+        parents = ids(entries[position].get("parents"))
+        if len(parents) > MAX_PARENTS:
+            result.warnings.append(
+                f"{entries[position]['name']}: kept the first {MAX_PARENTS} "
+                f"of {len(parents)} parents"
+            )
+            parents = parents[:MAX_PARENTS]
+        spouses = ids(entries[position].get("spouses"))
+        if parents or spouses:
+            updates[member_id] = {"parents": parents, "spouses": spouses}
+    if updates:
+        update_members(updates, household)
+
+
+# --------------------------------------------------
+# Export
+# --------------------------------------------------
+def export_path(household, fmt):
+    """Where the household's latest export archive is written."""
+    return os.path.join(household.root, "exports", "family" + EXPORT_FORMATS[fmt])
+
+
+def export_archive(household, fileobj, fmt="zip"):
+    """Write the household's members and original media as an archive."""
+    members = load_family_data(household)
+    manifest = {"version": MANIFEST_VERSION, "members": []}
+    files = {}   # archive path -> file on disk
+
+    position = {member_id: i for i, member_id in enumerate(members.ids)}
+
+    for m in members:
+        entry = {"name": m["name"], "relationship": m["relationship"],
+                 "image": None, "audio": None}
+        if m.get("gender"):
+            entry["gender"] = m["gender"]
+        for link in ("parents", "spouses"):
+            if m.get(link):
+                entry[link] = [position[i] for i in m[link] if i in position]
+        for media_field, prefix in (("image", "photos"), ("audio", "voices")):
+            if m.get(media_field):
+                path = os.path.join(household.media_folder(media_field), m[media_field])
+                if os.path.exists(path):
+                    entry[media_field] = f"{prefix}/{m[media_field]}"
+                    files[entry[media_field]] = path
+        manifest["members"].append(entry)
+
+    manifest_bytes = json.dumps(manifest, indent=2).encode("utf-8")
+
+    if fmt == "zip":
+        # Photos and voices are already compressed; only the manifest is deflated
+        with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_STORED) as zf:
+            zf.writestr(MANIFEST_NAME, manifest_bytes, zipfile.ZIP_DEFLATED)
+            for arcname, path in files.items():
+                zf.write(path, arcname)
+    elif fmt == "tar.gz":
+        with tarfile.open(fileobj=fileobj, mode="w:gz") as tar:
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(manifest_bytes)
+            tar.addfile(info, io.BytesIO(manifest_bytes))
+            for arcname, path in files.items():
+                tar.add(path, arcname)
+    else:
+        raise ValueError(f"Unknown archive format: {fmt}")
+    return len(members)
+
@@ -0,0 +1,236 @@
+import importlib.util
+import os
+import tempfile
+import threading
+import wave
+from functools import lru_cache
+
+import numpy as np
+
+# soundfile (optional) loads libsndfile through cffi; it is only imported
+# once a voice actually has to be decoded or encoded
+_HAS_SOUNDFILE = importlib.util.find_spec("soundfile") is not None
+
+# Voices are stored mono at this rate; plenty for speech
+SAMPLE_RATE = 22050
+
+# Frames quieter than this (relative to the clip's peak) count as silence
+SILENCE_DB = -40.0
+FRAME_SECONDS = 0.02
+SILENCE_PAD_SECONDS = 0.15
+
+# Loudness target for every rendition, with a peak ceiling to avoid clipping
+TARGET_RMS_DB = -20.0
+PEAK_CEILING = 0.97
+
+PREVIEW_SECONDS = 4.0
+FADE_SECONDS = 0.05
+
+# MP3 plays everywhere; fall back to 16-bit WAV when soundfile is missing
+if _HAS_SOUNDFILE:
+    RENDITION_EXT = "mp3"
+else:
+    RENDITION_EXT = "wav"
+
+RENDITION_KINDS = ("voice", "preview")
+
+_lock = threading.Lock()
+_failed = set()
+
+# Rendition paths known to exist, per folder, so serving needs no stat
+_known = {}
+
+
+@lru_cache(maxsize=None)
+def _soundfile():
+    if not _HAS_SOUNDFILE:
+        return None
+    import soundfile
+
+    return soundfile
+
+
+# --------------------------------------------------
+# Decode
+# --------------------------------------------------
+def _decode(path):
+    sf = _soundfile()
+    if sf is not None:
+        samples, sr = sf.read(path, dtype="float32", always_2d=True)
+        return samples.mean(axis=1), sr
+
+    # Stdlib fallback: PCM WAV only
+    with wave.open(path, "rb") as w:
+        sr = w.getframerate()
+        channels = w.getnchannels()
+        width = w.getsampwidth()
+        raw = w.readframes(w.getnframes())
+    if width != 2:
+        raise ValueError("Only 16-bit WAV can be decoded without soundfile")
+    samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    return samples.reshape(-1, channels).mean(axis=1), sr
+
+
+def _resample(samples, sr, target_sr):
+    if sr == target_sr or len(samples) == 0:
+        return samples
+    n_out = max(1, round(len(samples) * target_sr / sr))
+    positions = np.linspace(0, len(samples) - 1, n_out)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(
+        np.float32
+    )
+
+
+# --------------------------------------------------
+# Processing
+# --------------------------------------------------
+def trim_silence(samples, sr):
+    frame = max(1, int(sr * FRAME_SECONDS))
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return samples
+
+    frames = samples[: n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    peak = rms.max()
+    if peak <= 0:
+        return samples[:0]
+
+    loud = np.flatnonzero(rms >= peak * 10 ** (SILENCE_DB / 20))
+    pad = int(sr * SILENCE_PAD_SECONDS)
+    start = max(0, loud[0] * frame - pad)
+    end = min(len(samples), (loud[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+def normalize_loudness(samples):
+    if len(samples) == 0:
+        return samples
+    rms = float(np.sqrt(np.mean(samples ** 2)))
+    peak = float(np.abs(samples).max())
+    if rms <= 0 or peak <= 0:
+        return samples
+    gain = min(10 ** (TARGET_RMS_DB / 20) / rms, PEAK_CEILING / peak)
+    return (samples * gain).astype(np.float32)
+
+
+def _preview(samples, sr):
+    clip = samples[: int(sr * PREVIEW_SECONDS)].copy()
+    fade = min(len(clip), int(sr * FADE_SECONDS))
+    if fade and len(clip) < len(samples):
+        clip[-fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+    return clip
+
+
+# --------------------------------------------------
+# Encode
+# --------------------------------------------------
+def _encode(samples, sr, out_path):
+    # A private temp file per writer, as lazy re-ingests may overlap
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            sf = _soundfile()
+            if sf is not None:
+                sf.write(
+                    f, samples, sr,
+                    format="MP3", subtype="MPEG_LAYER_III",
+                )
+            else:
+                pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+                with wave.open(f, "wb") as w:
+                    w.setnchannels(1)
+                    w.setsampwidth(2)
+                    w.setframerate(sr)
+                    w.writeframes(pcm.tobytes())
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _known_renditions(folder):
+    # Callers hold _lock
+    known = _known.get(folder)
+    if known is None:
+        known = _known[folder] = set()
+        if os.path.isdir(folder):
+            known.update(entry.path for entry in os.scandir(folder))
+    return known
+
+
+def _rendition_path(household, audio_name, kind):
+    return os.path.join(
+        household.audio_cache_folder, f"{audio_name}.{kind}.{RENDITION_EXT}"
+    )
+
+
+# --------------------------------------------------
+# Ingest an uploaded voice once
+# --------------------------------------------------
+def ingest_audio(household, audio_name):
+    """Decode, trim, normalise and store the voice and preview renditions.
+
+    Returns False when the upload cannot be decoded; the original is then
+    served as-is.
+    """
+    source = os.path.join(household.audio_folder, audio_name)
+    try:
+        samples, sr = _decode(source)
+    except Exception:
+        with _lock:
+            _failed.add(source)
+        return False
+
+    samples = _resample(samples, sr, SAMPLE_RATE)
+    samples = normalize_loudness(trim_silence(samples, SAMPLE_RATE))
+    if len(samples) == 0:
+        with _lock:
+            _failed.add(source)
+        return False
+
+    os.makedirs(household.audio_cache_folder, exist_ok=True)
+    voice_path = _rendition_path(household, audio_name, "voice")
+    preview_path = _rendition_path(household, audio_name, "preview")
+    _encode(samples, SAMPLE_RATE, voice_path)
+    _encode(_preview(samples, SAMPLE_RATE), SAMPLE_RATE, preview_path)
+    with _lock:
+        _known_renditions(household.audio_cache_folder).update(
+            (voice_path, preview_path)
+        )
+    return True
+
+
+# --------------------------------------------------
+# Serve a rendition (re-ingested lazily if missing)
+# --------------------------------------------------
+def audio_path(household, audio_name, kind="voice"):
+    path = _rendition_path(household, audio_name, kind)
+    with _lock:
+        if path in _known_renditions(household.audio_cache_folder):
+            return path
+    if os.path.exists(path):
+        with _lock:
+            _known_renditions(household.audio_cache_folder).add(path)
+        return path
+
+    source = os.path.join(household.audio_folder, audio_name)
+    if not os.path.exists(source):
+        return None
+
+    with _lock:
+        failed = source in _failed
+    if not failed and ingest_audio(household, audio_name):
+        return path
+    return source
+
+
+def remove_renditions(household, audio_name):
+    for kind in RENDITION_KINDS:
+        path = _rendition_path(household, audio_name, kind)
+        with _lock:
+            _known_renditions(household.audio_cache_folder).discard(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
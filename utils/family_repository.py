@@ -0,0 +1,107 @@
+import threading
+
+from utils.households import current_household
+from utils.instrumentation import span
+from utils.member_store import EMPTY, MemberStore
+from utils.storage import get_backend, on_close
+
+# --------------------------------------------------
+# Process-wide snapshot cache
+# --------------------------------------------------
+# Every screen shares one MemberStore per household version per process,
+# so sessions hold member IDs rather than copies of members. The backend
+# is only re-read when its change stamp moves (file mtime/size for JSON,
+# a version counter bumped by every SQLite transaction).
+_lock = threading.Lock()
+_cache = {}
+_stats = {"hits": 0, "misses": 0}
+
+
+# --------------------------------------------------
+# Load family data (immutable, cached)
+# --------------------------------------------------
+def load_family_data(household=None):
+    with span("load"):
+        return _load(household)
+
+
+def _load(household):
+    backend = get_backend(household or current_household())
+    stamp = backend.stamp()
+    if stamp is None:
+        return EMPTY
+
+    with _lock:
+        entry = _cache.get(backend.path)
+        if entry is not None and entry[0] == stamp:
+            _stats["hits"] += 1
+            return entry[1]
+
+    snapshot = MemberStore(backend.load())
+
+    with _lock:
+        _stats["misses"] += 1
+        _cache[backend.path] = (stamp, snapshot)
+    return snapshot
+
+
+# --------------------------------------------------
+# Save family data
+# --------------------------------------------------
+def _invalidate(backend):
+    with _lock:
+        _cache.pop(backend.path, None)
+
+
+# A household's snapshot goes when its database is closed as idle
+on_close(_invalidate)
+
+
+def save_family_data(data, household=None):
+    backend = get_backend(household or current_household())
+    backend.save_all(data)
+    _invalidate(backend)
+
+
+def add_member(member, household=None):
+    """Store a new member and return its ID."""
+    backend = get_backend(household or current_household())
+    member_id = backend.add_member(member)
+    _invalidate(backend)
+    return member_id
+
+
+def add_members(members, household=None):
+    """Store new members in one transaction and return their IDs, in order."""
+    backend = get_backend(household or current_household())
+    member_ids = backend.add_members(members)
+    _invalidate(backend)
+    return member_ids
+
+
+def update_members(updates, household=None):
+    """Merge ``{member_id: {field: value}}`` into existing members."""
+    backend = get_backend(household or current_household())
+    backend.update_members(updates)
+    _invalidate(backend)
+
+
+def delete_member(member_id, household=None):
+    backend = get_backend(household or current_household())
+    backend.delete_member(member_id)
+    _invalidate(backend)
+
+
+# --------------------------------------------------
+# Cache statistics
+# --------------------------------------------------
+def cache_stats():
+    with _lock:
+        return dict(_stats, entries=len(_cache))
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
@@ -0,0 +1,107 @@
+import math
+import re
+
+import streamlit as st
+
+from utils.integrity import is_missing
+from utils.media_server import media_url
+from utils.member_store import is_ready
+from utils.thumbnails import thumbnail_path
+
+# Multiples of the 3-column grid so pages always end on a full row
+PAGE_SIZES = (9, 24, 48, 96)
+DEFAULT_PAGE_SIZE = 9
+
+PLACEHOLDER_COLOR = "#d9d9d9"
+_HEX_COLOR = re.compile(r"^#[0-9a-f]{6}$")
+
+
+# --------------------------------------------------
+# Member photo (placeholder when the file is missing)
+# --------------------------------------------------
+def member_photo(household, member, width):
+    """Show a member's thumbnail, or a block in the photo's dominant colour
+    and aspect ratio while it is being prepared or when the integrity check
+    found the photo missing."""
+    if is_ready(member) and not is_missing(household, "image", member["image"]):
+        thumb = thumbnail_path(household, member["image"], width)
+        if thumb:
+            st.image(media_url(thumb), width=width)
+            return
+
+    meta = member.get("image_meta") or {}
+    height = width
+    if meta.get("width") and meta.get("height"):
+        height = round(width * meta["height"] / meta["width"])
+    color = meta.get("color", "")
+    if not _HEX_COLOR.match(color):
+        color = PLACEHOLDER_COLOR
+    st.markdown(
+        f'<div style="width:{width}px;height:{height}px;'
+        f'background:{color};border-radius:8px"></div>',
+        unsafe_allow_html=True,
+    )
+
+
+# --------------------------------------------------
+# Paginated member grid
+# --------------------------------------------------
+def member_gallery(members, key, render_member, columns=3):
+    """Show one page of ``members`` in a grid.
+
+    Only the members on the current page are rendered, so their photos
+    and voices are the only media read on a rerun. ``render_member`` is
+    called as ``render_member(member, index)`` with the member's index in
+    the full list.
+    """
+    total = len(members)
+    if total == 0:
+        return
+
+    # One page-size setting shared by every gallery in the session
+    page_size = st.session_state.get("gallery_page_size", DEFAULT_PAGE_SIZE)
+    page_key = f"{key}_page"
+    pages = max(1, math.ceil(total / page_size))
+    page = min(st.session_state.get(page_key, 0), pages - 1)
+
+    start = page * page_size
+    end = min(start + page_size, total)
+
+    cols = st.columns(columns)
+    for idx in range(start, end):
+        with cols[(idx - start) % columns]:
+            render_member(members[idx], idx)
+
+    if total <= PAGE_SIZES[0]:
+        return
+
+    # -------------------------------
+    # Page navigation
+    # -------------------------------
+    nav_prev, nav_info, nav_next, nav_size = st.columns([1, 2, 1, 2])
+
+    with nav_prev:
+        if st.button("◀ Prev", key=f"{key}_prev", disabled=page == 0):
+            st.session_state[page_key] = page - 1
+            st.rerun()
+
+    with nav_info:
+        st.caption(f"Page {page + 1} of {pages} · {start + 1}–{end} of {total}")
+
+    with nav_next:
+        if st.button("Next ▶", key=f"{key}_next", disabled=page >= pages - 1):
+            st.session_state[page_key] = page + 1
+            st.rerun()
+
+    with nav_size:
+        new_size = st.selectbox(
+            "Per page",
+            PAGE_SIZES,
+            index=PAGE_SIZES.index(page_size),
+            key=f"{key}_page_size",
+        )
+        if new_size != page_size:
+            # Keep the first visible member on screen
+            st.session_state.gallery_page_size = new_size
+            st.session_state[page_key] = start // new_size
+            st.rerun()
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import streamlit as st
+
+# Root of all on-disk data; override to host data elsewhere
+DATA_ROOT = os.environ.get("KMF_DATA_DIR", "data")
+
+# The default household keeps the original single-family layout under
+# DATA_ROOT, so existing installs keep working untouched.
+DEFAULT_HOUSEHOLD = "default"
+
+HOUSEHOLD_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Households whose databases (and cached members) a process keeps open;
+# the least recently used are closed beyond this
+OPEN_HOUSEHOLDS = 64
+
+
+# --------------------------------------------------
+# Household paths
+# --------------------------------------------------
+@dataclass(frozen=True)
+class Household:
+    id: str
+    root: str
+
+    @property
+    def data_file(self):
+        return os.path.join(self.root, "family_data.json")
+
+    @property
+    def db_file(self):
+        return os.path.join(self.root, "family.db")
+
+    @property
+    def progress_db(self):
+        return os.path.join(self.root, "progress.db")
+
+    @property
+    def image_folder(self):
+        return os.path.join(self.root, "images")
+
+    @property
+    def audio_folder(self):
+        return os.path.join(self.root, "audio")
+
+    @property
+    def audio_cache_folder(self):
+        return os.path.join(self.root, "audio_renditions")
+
+    @property
+    def thumb_folder(self):
+        return os.path.join(self.root, "thumbnails")
+
+    def media_folder(self, field):
+        return {"image": self.image_folder, "audio": self.audio_folder}[field]
+
+
+def _root_for(household_id):
+    if household_id == DEFAULT_HOUSEHOLD:
+        return DATA_ROOT
+    # Two levels of hash sharding keep every directory small, so opening a
+    # household never has to scan a folder with thousands of entries.
+    digest = hashlib.sha1(household_id.encode("utf-8")).hexdigest()
+    return os.path.join(
+        DATA_ROOT, "households", digest[:2], digest[2:4], household_id
+    )
+
+
+# --------------------------------------------------
+# Household index
+# --------------------------------------------------
+_lock = threading.Lock()
+_households = {}
+_index = None
+
+
+def _index_conn():
+    global _index
+    if _index is None:
+        os.makedirs(DATA_ROOT, exist_ok=True)
+        _index = sqlite3.connect(
+            os.path.join(DATA_ROOT, "households.db"),
+            timeout=30, check_same_thread=False, isolation_level=None,
+        )
+        _index.execute("PRAGMA journal_mode=WAL")
+        _index.execute(
+            "CREATE TABLE IF NOT EXISTS households ("
+            " id TEXT PRIMARY KEY,"
+            " root TEXT NOT NULL,"
+            " created_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+    return _index
+
+
+def get_household(household_id, create=False):
+    """The household ``household_id``; KeyError if it was never created.
+
+    The default household always exists. Others are created only through
+    ``create_household``, never by opening a link.
+    """
+    if not HOUSEHOLD_ID_PATTERN.match(household_id or ""):
+        raise ValueError(f"Invalid household id: {household_id!r}")
+
+    with _lock:
+        household = _households.get(household_id)
+        if household is not None:
+            return household
+
+        conn = _index_conn()
+        row = conn.execute(
+            "SELECT root FROM households WHERE id = ?", (household_id,)
+        ).fetchone()
+        if row is None:
+            if not create and household_id != DEFAULT_HOUSEHOLD:
+                raise KeyError(household_id)
+            root = _root_for(household_id)
+            conn.execute(
+                "INSERT OR IGNORE INTO households (id, root, created_at)"
+                " VALUES (?, ?, ?)",
+                (household_id, root, time.time()),
+            )
+        else:
+            root = row[0]
+
+        household = Household(household_id, root)
+        for folder in (household.image_folder, household.audio_folder):
+            os.makedirs(folder, exist_ok=True)
+
+        _households[household_id] = household
+        return household
+
+
+def create_household(household_id):
+    """Create (or open) a household; the only path that adds one."""
+    return get_household(household_id, create=True)
+
+
+# --------------------------------------------------
+# Session binding
+# --------------------------------------------------
+def current_household():
+    household_id = st.session_state.get("household_id", DEFAULT_HOUSEHOLD)
+    return get_household(household_id)
+
+
+if __name__ == "__main__":
+    # python -m utils.households <id> creates a household; share it with
+    # the app's address plus ?household=<id>
+    import sys
+
+    for household_id in sys.argv[1:]:
+        print(f"{household_id}: {create_household(household_id).root}")
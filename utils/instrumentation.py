@@ -0,0 +1,238 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Set KMF_TRACE_DIR to a folder to record per-rerun traces there:
+#   reruns.jsonl  one JSON record per rerun
+#   metrics.prom  Prometheus text exposition, rewritten every few seconds
+TRACE_DIR = os.environ.get("KMF_TRACE_DIR")
+ENABLED = bool(TRACE_DIR)
+
+PROM_INTERVAL_SECONDS = 5.0
+RERUN_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Shared no-op context: with tracing off a span costs one function call
+_NULL = nullcontext()
+
+_local = threading.local()
+_lock = threading.Lock()
+_metrics = {
+    "reruns": {},      # route -> count
+    "seconds": {},     # route -> total rerun seconds
+    "buckets": {},     # route -> [count per bucket]
+    "spans": {},       # span -> total seconds
+    "opens": {},       # route -> files opened
+    "bytes_read": {},  # route -> bytes read
+}
+_last_prom_write = 0.0
+_hook_installed = False
+
+
+# --------------------------------------------------
+# I/O counters
+# --------------------------------------------------
+def _audit(event, args):
+    if event == "open":
+        trace = getattr(_local, "trace", None)
+        if trace is not None and not getattr(_local, "busy", False):
+            trace["opens"] += 1
+
+
+def _thread_read_bytes():
+    # rchar of the current thread: bytes read through any read syscall
+    _local.busy = True
+    try:
+        with open("/proc/thread-self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    finally:
+        _local.busy = False
+
+
+# --------------------------------------------------
+# Spans
+# --------------------------------------------------
+@contextmanager
+def _span(name):
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace["open"].append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if trace is not None:
+            trace["open"].pop()
+            spans = trace["spans"]
+            spans[name] = spans.get(name, 0.0) + elapsed
+            # Also credit the time to every span this one ran inside
+            inside = trace["inside"]
+            for outer in set(trace["open"]):
+                key = (outer, name)
+                inside[key] = inside.get(key, 0.0) + elapsed
+
+
+def span(name):
+    """Time a block inside the current rerun (no-op when tracing is off)."""
+    if not ENABLED:
+        return _NULL
+    return _span(name)
+
+
+# --------------------------------------------------
+# Reruns
+# --------------------------------------------------
+@contextmanager
+def _rerun(route):
+    global _hook_installed
+    if not _hook_installed:
+        with _lock:
+            if not _hook_installed:
+                sys.addaudithook(_audit)
+                _hook_installed = True
+
+    trace = {"route": route, "spans": {}, "opens": 0, "open": [], "inside": {}}
+    read_before = _thread_read_bytes()
+    _local.trace = trace
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace["seconds"] = time.perf_counter() - start
+        _local.trace = None
+        read_after = _thread_read_bytes()
+        if read_before is not None and read_after is not None:
+            trace["bytes_read"] = read_after - read_before
+        _record(trace)
+
+
+def rerun(route):
+    """Wrap one script run; records spans, file opens and bytes read."""
+    if not ENABLED:
+        return _NULL
+    return _rerun(route)
+
+
+# --------------------------------------------------
+# Export
+# --------------------------------------------------
+def _record(trace):
+    global _last_prom_write
+    route = trace["route"]
+    seconds = trace["seconds"]
+
+    # Rendering is whatever the screen spent outside its own data loading;
+    # loads elsewhere (e.g. the route check) are not part of the screen
+    spans = trace["spans"]
+    if "screen" in spans:
+        loading = trace["inside"].get(("screen", "load"), 0.0)
+        spans["render"] = max(0.0, spans["screen"] - loading)
+
+    with _lock:
+        m = _metrics
+        m["reruns"][route] = m["reruns"].get(route, 0) + 1
+        m["seconds"][route] = m["seconds"].get(route, 0.0) + seconds
+        buckets = m["buckets"].setdefault(route, [0] * len(RERUN_BUCKETS))
+        for i, bound in enumerate(RERUN_BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        for name, value in trace["spans"].items():
+            m["spans"][name] = m["spans"].get(name, 0.0) + value
+        m["opens"][route] = m["opens"].get(route, 0) + trace["opens"]
+        m["bytes_read"][route] = (
+            m["bytes_read"].get(route, 0) + trace.get("bytes_read", 0)
+        )
+
+        record = {
+            "ts": round(time.time(), 3),
+            "route": route,
+            "ms": round(seconds * 1000, 2),
+            "spans_ms": {
+                k: round(v * 1000, 2) for k, v in trace["spans"].items()
+            },
+            "opens": trace["opens"],
+            "bytes_read": trace.get("bytes_read"),
+        }
+
+        _local.busy = True
+        try:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            with open(os.path.join(TRACE_DIR, "reruns.jsonl"), "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+            now = time.monotonic()
+            if now - _last_prom_write >= PROM_INTERVAL_SECONDS:
+                _write_prometheus()
+                _last_prom_write = now
+        finally:
+            _local.busy = False
+
+
+def prometheus_text():
+    with _lock:
+        return _prometheus_text()
+
+
+def _prometheus_text():
+    m = _metrics
+    lines = [
+        "# HELP kmf_rerun_seconds Script rerun wall time per route.",
+        "# TYPE kmf_rerun_seconds histogram",
+    ]
+    for route, count in sorted(m["reruns"].items()):
+        for bound, bucket in zip(RERUN_BUCKETS, m["buckets"][route]):
+            lines.append(
+                f'kmf_rerun_seconds_bucket{{route="{route}",le="{bound}"}} {bucket}'
+            )
+        lines.append(f'kmf_rerun_seconds_bucket{{route="{route}",le="+Inf"}} {count}')
+        lines.append(f'kmf_rerun_seconds_sum{{route="{route}"}} {m["seconds"][route]:.6f}')
+        lines.append(f'kmf_rerun_seconds_count{{route="{route}"}} {count}')
+
+    lines += [
+        "# HELP kmf_span_seconds_total Time spent per span across reruns.",
+        "# TYPE kmf_span_seconds_total counter",
+    ]
+    for name, value in sorted(m["spans"].items()):
+        lines.append(f'kmf_span_seconds_total{{span="{name}"}} {value:.6f}')
+
+    lines += [
+        "# HELP kmf_file_opens_total Files opened during reruns.",
+        "# TYPE kmf_file_opens_total counter",
+    ]
+    for route, value in sorted(m["opens"].items()):
+        lines.append(f'kmf_file_opens_total{{route="{route}"}} {value}')
+
+    lines += [
+        "# HELP kmf_bytes_read_total Bytes read during reruns.",
+        "# TYPE kmf_bytes_read_total counter",
+    ]
+    for route, value in sorted(m["bytes_read"].items()):
+        lines.append(f'kmf_bytes_read_total{{route="{route}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def _write_prometheus():
+    path = os.path.join(TRACE_DIR, "metrics.prom")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(_prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def _flush():
+    with _lock:
+        if _metrics["reruns"]:
+            _write_prometheus()
+
+
+if ENABLED:
+    atexit.register(_flush)
@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+import time
+
+from utils.family_repository import load_family_data, update_members
+from utils.media_meta import media_metadata
+from utils.media_store import MEDIA_FIELDS
+from utils.member_store import PROCESSING, is_ready
+
+# How often each household's media is re-checked in the background
+CHECK_INTERVAL_SECONDS = 300
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# Results (read by screens, written by the checker)
+# --------------------------------------------------
+# Screens only ever look at these in-memory results; the file system is
+# touched by the background thread alone.
+_lock = threading.Lock()
+_missing = {}    # household root -> frozenset of (field, filename)
+_last_run = {}   # household root -> monotonic time of the last start
+_running = set()
+
+
+def missing_media(household):
+    """``(field, filename)`` pairs found missing by the last check."""
+    with _lock:
+        return _missing.get(household.root, frozenset())
+
+
+def is_missing(household, field, filename):
+    return (field, filename) in missing_media(household)
+
+
+# --------------------------------------------------
+# Background check
+# --------------------------------------------------
+def ensure_checked(household):
+    """Start a background check if the household's last one is stale."""
+    now = time.monotonic()
+    with _lock:
+        last = _last_run.get(household.root)
+        if household.root in _running or (
+            last is not None and now - last < CHECK_INTERVAL_SECONDS
+        ):
+            return
+        _running.add(household.root)
+        _last_run[household.root] = now
+
+    threading.Thread(
+        target=_run, args=(household,), daemon=True,
+        name=f"kmf-integrity-{household.id}",
+    ).start()
+
+
+def _run(household):
+    try:
+        check_household(household)
+    except Exception:
+        logger.exception("Media integrity check failed for %s", household.id)
+    finally:
+        with _lock:
+            _running.discard(household.root)
+
+
+def check_household(household):
+    """Flag missing media and backfill metadata members were saved without.
+
+    Returns the set of missing ``(field, filename)`` pairs.
+    """
+    missing = set()
+    updates = {}
+
+    family = load_family_data(household)
+    for member in family:
+        present = {}
+        for field in MEDIA_FIELDS:
+            filename = member.get(field)
+            if not filename:
+                continue
+            if os.path.exists(os.path.join(household.media_folder(field), filename)):
+                present[field] = filename
+            else:
+                missing.add((field, filename))
+
+        if not is_ready(member):
+            # The upload queue records metadata for new members itself
+            continue
+        if any(f"{field}_meta" not in member for field in present) or (
+            "audio" in present and "voiceprint" not in member.get("audio_meta", {})
+        ):
+            try:
+                fields = media_metadata(household, present)
+            except Exception:
+                logger.warning("Unreadable media for member %s", member["id"])
+                continue
+            updates[member["id"]] = fields
+
+    if updates:
+        update_members(updates, household)
+
+    if any(m.get("status") == PROCESSING for m in family):
+        # Re-queue uploads interrupted by a restart; the queue pulls in the
+        # image and audio libraries, so it is only imported when needed
+        from utils.upload_queue import resume
+
+        resume(household, family)
+
+    with _lock:
+        _missing[household.root] = frozenset(missing)
+    if missing:
+        logger.warning(
+            "%d media file(s) missing for household %s", len(missing), household.id
+        )
+    return missing
@@ -0,0 +1,282 @@
+import threading
+from collections import deque
+
+from utils.family_repository import update_members
+
+# Family tree edges live on the member records:
+#   "parents": [member ids]   "spouses": [member ids]   "gender": "female"/"male"
+# Children are the reverse of parents and spouses are symmetric, so each
+# edge only has to be stored once.
+#
+# Kinship is described by the shortest path of steps between two people:
+# P (to a parent), C (to a child) and S (to a spouse). Every member's
+# neighbourhood up to MAX_DEPTH steps is computed once per household
+# version, so lookups are dictionary reads.
+MAX_DEPTH = 4
+
+# The tree editor offers two parent slots
+MAX_PARENTS = 2
+
+# Shortest step path -> gender-neutral term
+TERMS = {
+    "P": "parent",
+    "C": "child",
+    "S": "spouse",
+    "PC": "sibling",
+    "PP": "grandparent",
+    "CC": "grandchild",
+    "PS": "step_parent",
+    "SC": "step_child",
+    "SP": "parent_in_law",
+    "CS": "child_in_law",
+    "PPC": "aunt_uncle",
+    "PPCS": "aunt_uncle",
+    "PCC": "niece_nephew",
+    "PPCC": "cousin",
+    "PPP": "great_grandparent",
+    "CCC": "great_grandchild",
+    "SPC": "sibling_in_law",
+    "PCS": "sibling_in_law",
+}
+
+# Term -> (female, male, either) labels
+LABELS = {
+    "parent": ("mother", "father", "parent"),
+    "child": ("daughter", "son", "child"),
+    "spouse": ("wife", "husband", "spouse"),
+    "sibling": ("sister", "brother", "sibling"),
+    "grandparent": ("grandmother", "grandfather", "grandparent"),
+    "grandchild": ("granddaughter", "grandson", "grandchild"),
+    "step_parent": ("stepmother", "stepfather", "step-parent"),
+    "step_child": ("stepdaughter", "stepson", "stepchild"),
+    "parent_in_law": ("mother-in-law", "father-in-law", "parent-in-law"),
+    "child_in_law": ("daughter-in-law", "son-in-law", "child-in-law"),
+    "aunt_uncle": ("aunt", "uncle", "aunt or uncle"),
+    "niece_nephew": ("niece", "nephew", "niece or nephew"),
+    "cousin": ("cousin", "cousin", "cousin"),
+    "great_grandparent": ("great-grandmother", "great-grandfather", "great-grandparent"),
+    "great_grandchild": ("great-granddaughter", "great-grandson", "great-grandchild"),
+    "sibling_in_law": ("sister-in-law", "brother-in-law", "sibling-in-law"),
+}
+
+# Gendered words accepted in queries -> (term, gender)
+_WORDS = {}
+for _term, (_female, _male, _either) in LABELS.items():
+    _WORDS.setdefault(_female, (_term, "female"))
+    _WORDS.setdefault(_male, (_term, "male"))
+    _WORDS[_either] = (_term, None)
+    _WORDS[_term] = (_term, None)
+
+_STEP_ORDER = "PCS"
+
+
+def _adjacency(family):
+    """``{member id: ((step, other id), ...)}`` for members of ``family``."""
+    known = set(family.ids)
+    steps = {member_id: set() for member_id in known}
+    for m in family:
+        for parent in m.get("parents") or ():
+            if parent in known and parent != m["id"]:
+                steps[m["id"]].add(("P", parent))
+                steps[parent].add(("C", m["id"]))
+        for spouse in m.get("spouses") or ():
+            if spouse in known and spouse != m["id"]:
+                steps[m["id"]].add(("S", spouse))
+                steps[spouse].add(("S", m["id"]))
+    # A fixed order keeps the chosen path stable between equal-length ones
+    return {
+        member_id: tuple(sorted(edges, key=lambda e: (_STEP_ORDER.index(e[0]), e[1])))
+        for member_id, edges in steps.items()
+    }
+
+
+def _neighbourhood(adjacency, start, depth=MAX_DEPTH):
+    """Shortest step path from ``start`` to everyone within ``depth`` steps."""
+    paths = {start: ""}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        path = paths[node]
+        if len(path) == depth:
+            continue
+        for step, other in adjacency.get(node, ()):
+            if other not in paths:
+                paths[other] = path + step
+                queue.append(other)
+    del paths[start]
+    return paths
+
+
+def _by_term(paths):
+    terms = {}
+    for other, path in paths.items():
+        term = TERMS.get(path)
+        if term:
+            terms.setdefault(term, []).append(other)
+    return {term: tuple(ids) for term, ids in terms.items()}
+
+
+# --------------------------------------------------
+# Kinship graph (one per household version)
+# --------------------------------------------------
+class KinshipGraph:
+    """Precomputed kinship between a family's members.
+
+    Build one with ``KinshipGraph(family)``; for the next version of the
+    family use ``graph.updated(family)``, which only recomputes members
+    near an edited one.
+    """
+
+    def __init__(self, family, _previous=None):
+        self.family = family
+        self._adjacency = _adjacency(family)
+
+        if _previous is None:
+            stale = set(self._adjacency)
+            self._paths, self._terms = {}, {}
+        else:
+            stale = _previous._affected_by(self._adjacency)
+            self._paths = {
+                k: v for k, v in _previous._paths.items()
+                if k in self._adjacency and k not in stale
+            }
+            self._terms = {
+                k: v for k, v in _previous._terms.items()
+                if k in self._adjacency and k not in stale
+            }
+
+        for member_id in stale:
+            if member_id in self._adjacency:
+                paths = _neighbourhood(self._adjacency, member_id)
+                self._paths[member_id] = paths
+                self._terms[member_id] = _by_term(paths)
+        self.recomputed = len(stale)
+
+    def _affected_by(self, adjacency):
+        """Members whose neighbourhood may differ under ``adjacency``."""
+        changed = {
+            member_id
+            for member_id in self._adjacency.keys() | adjacency.keys()
+            if self._adjacency.get(member_id) != adjacency.get(member_id)
+        }
+        affected = set(changed)
+        for member_id in changed:
+            for graph in (self._adjacency, adjacency):
+                if member_id in graph:
+                    affected.update(_neighbourhood(graph, member_id))
+        return affected
+
+    def updated(self, family):
+        return KinshipGraph(family, _previous=self)
+
+    # ----------------------------------------------
+    # Queries
+    # ----------------------------------------------
+    def path(self, from_id, to_id):
+        """Step path such as ``"PPC"``, or None beyond MAX_DEPTH steps."""
+        return self._paths.get(from_id, {}).get(to_id)
+
+    def relatives(self, member_id, word):
+        """IDs of ``member_id``'s relatives called ``word``, e.g. "cousin"
+        or "mother". Gendered words need the relative's ``gender``."""
+        term, gender = _WORDS.get(word.strip().lower(), (None, None))
+        ids = self._terms.get(member_id, {}).get(term, ())
+        if gender:
+            ids = tuple(
+                i for i in ids if (self.family.get(i) or {}).get("gender") == gender
+            )
+        return ids
+
+    def follow(self, member_id, words):
+        """Relatives reached by a chain of words, e.g.
+        ``("mother", "brother")`` for "mother's brother"."""
+        current = {member_id}
+        for word in words:
+            current = {
+                other for m in current for other in self.relatives(m, word)
+            }
+        current.discard(member_id)
+        return tuple(sorted(current))
+
+    def related(self, member_id):
+        """IDs of everyone with a named relationship to ``member_id``."""
+        return tuple(
+            i for ids in self._terms.get(member_id, {}).values() for i in ids
+        )
+
+    def is_ancestor(self, ancestor_id, member_id):
+        """True if ``ancestor_id`` is a parent, grandparent, ... of ``member_id``."""
+        seen, stack = set(), [member_id]
+        while stack:
+            for step, other in self._adjacency.get(stack.pop(), ()):
+                if step == "P" and other not in seen:
+                    if other == ancestor_id:
+                        return True
+                    seen.add(other)
+                    stack.append(other)
+        return False
+
+    def label(self, from_id, member):
+        """How ``from_id`` would address ``member``, falling back to the
+        relationship typed in setup."""
+        kin = self.describe(from_id, member["id"]) if from_id is not None else None
+        return kin.capitalize() if kin else member["relationship"]
+
+    def describe(self, from_id, to_id):
+        """What ``from_id`` calls ``to_id`` (e.g. "grandmother"), or None."""
+        term = TERMS.get(self.path(from_id, to_id))
+        if term is None:
+            return None
+        female, male, either = LABELS[term]
+        gender = (self.family.get(to_id) or {}).get("gender")
+        return {"female": female, "male": male}.get(gender, either)
+
+
+_lock = threading.Lock()
+_graphs = {}   # household root -> KinshipGraph
+
+
+def kinship(household, family):
+    """The household's kinship graph, updated only when the family changes."""
+    with _lock:
+        graph = _graphs.get(household.root)
+        if graph is None:
+            graph = KinshipGraph(family)
+        elif graph.family is not family:
+            graph = graph.updated(family)
+        _graphs[household.root] = graph
+        return graph
+
+
+# --------------------------------------------------
+# Editing links
+# --------------------------------------------------
+def link_members(household, family, member_id, gender, parents, spouses):
+    """Save ``member_id``'s gender, parents and spouses.
+
+    Spouse links are symmetric, so a spouse removed here is also unlinked
+    on the other side. Raises ValueError for a parent who descends from
+    the member, or for more than MAX_PARENTS parents.
+    """
+    if len(parents) > MAX_PARENTS:
+        raise ValueError(
+            f"{family.get(member_id)['name']} can have at most "
+            f"{MAX_PARENTS} parents"
+        )
+    graph = kinship(household, family)
+    for parent in parents:
+        if parent == member_id or graph.is_ancestor(member_id, parent):
+            raise ValueError(
+                f"{family.get(parent)['name']} cannot be a parent of "
+                f"{family.get(member_id)['name']}"
+            )
+
+    updates = {member_id: {
+        "gender": gender, "parents": list(parents), "spouses": list(spouses),
+    }}
+    for other in graph.relatives(member_id, "spouse"):
+        if other not in spouses:
+            updates[other] = {"spouses": [
+                s for s in family.get(other).get("spouses") or () if s != member_id
+            ]}
+    update_members(updates, household)
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import re
+import wave
+
+from utils.media_store import CHUNK_SIZE
+
+# Stored media is named by its SHA-256, so the hash is usually free
+_SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+# EXIF orientations that swap width and height
+_ROTATED = (5, 6, 7, 8)
+
+
+def _sha256(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if _SHA256_NAME.match(stem):
+        return stem
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --------------------------------------------------
+# Photos
+# --------------------------------------------------
+def image_metadata(path):
+    """Size, format, hash and dominant colour of a photo."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        width, height = img.size
+        if img.getexif().get(0x0112) in _ROTATED:
+            width, height = height, width
+        fmt = img.format
+        # Decode at a fraction of full size; one averaged pixel is enough
+        img.draft("RGB", (64, 64))
+        r, g, b = img.convert("RGB").resize((1, 1), Image.BOX).getpixel((0, 0))
+
+    return {
+        "width": width,
+        "height": height,
+        "format": fmt,
+        "bytes": os.path.getsize(path),
+        "sha256": _sha256(path),
+        "color": f"#{r:02x}{g:02x}{b:02x}",
+    }
+
+
+# --------------------------------------------------
+# Voices
+# --------------------------------------------------
+def _duration(path):
+    try:
+        import soundfile
+
+        return round(soundfile.info(path).duration, 2)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with wave.open(path, "rb") as w:
+            return round(w.getnframes() / w.getframerate(), 2)
+    except (wave.Error, EOFError):
+        return None
+
+
+def audio_metadata(path):
+    """Size, format, hash, duration and voiceprint of a voice.
+
+    Duration and voiceprint are None when the voice cannot be decoded.
+    """
+    # NumPy feature extraction stays off the start-up path
+    from utils.voice_features import voiceprint
+
+    return {
+        "format": os.path.splitext(path)[1].lstrip(".").lower() or None,
+        "bytes": os.path.getsize(path),
+        "sha256": _sha256(path),
+        "duration": _duration(path),
+        "voiceprint": voiceprint(path),
+    }
+
+
+# --------------------------------------------------
+# Member records
+# --------------------------------------------------
+def media_metadata(household, member):
+    """``image_meta``/``audio_meta`` fields for a member's stored media."""
+    fields = {}
+    if member.get("image"):
+        fields["image_meta"] = image_metadata(
+            os.path.join(household.image_folder, member["image"])
+        )
+    if member.get("audio"):
+        fields["audio_meta"] = audio_metadata(
+            os.path.join(household.audio_folder, member["audio"])
+        )
+    return fields
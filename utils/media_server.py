@@ -0,0 +1,249 @@
+import logging
+import mimetypes
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import streamlit as st
+
+# Thumbnails and voice renditions are served by URL instead of through
+# st.image/st.audio reading the file, which registers a new media entry on
+# every rerun. Their names are derived from the content hash, so every URL
+# stays valid for the file's lifetime and browsers may cache it.
+#
+# By default they go through Streamlit's own static file serving, on the
+# app's port (server.enableStaticServing, on in .streamlit/config.toml):
+# each file is hard-linked into static/media/ and shown as
+# /app/static/media/.... Streamlit turns static serving off when the folder
+# passes 1 GB, and a data folder on another file system cannot be linked;
+# files are then passed to Streamlit as before.
+#
+# A separate endpoint with immutable caching is opt-in: only the operator
+# knows whether browsers can reach a second port. Set KMF_MEDIA_PORT (e.g.
+# 8502) to turn it on; it listens on the same address as Streamlit
+# (server.address). Behind a proxy or on HTTPS, route a path to the
+# endpoint and set KMF_MEDIA_URL to its public base, e.g. "/media".
+MEDIA_PORT = int(os.environ.get("KMF_MEDIA_PORT") or "0")
+MEDIA_URL = os.environ.get("KMF_MEDIA_URL")
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_MEDIA = os.path.join(APP_ROOT, "static", "media")
+
+# Bump when derivatives are rendered differently, so browsers refetch them
+MEDIA_VERSION = "v1"
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 1024 * 1024
+
+_NAME = re.compile(r"^[0-9a-f]{64}[A-Za-z0-9.]*$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_files = {}   # served name -> file on disk
+_server = None
+_failed = False
+_published = set()   # names linked into the static folder by this process
+_static_failed = False
+
+
+# --------------------------------------------------
+# Request handler
+# --------------------------------------------------
+class _MediaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._serve(body=True)
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def _serve(self, body):
+        version, _, name = urlsplit(self.path).path.lstrip("/").partition("/")
+        with _lock:
+            path = _files.get(name) if version == MEDIA_VERSION else None
+        if path is None:
+            self.send_error(404)
+            return
+
+        etag = f'"{MEDIA_VERSION}-{name}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self._cache_headers(etag)
+            self.end_headers()
+            return
+
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            # Browsers seek in audio with single byte ranges
+            match = _RANGE.match(self.headers.get("Range", ""))
+            if match and (match.group(1) or match.group(2)):
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2) or end), end)
+                else:
+                    start = max(0, size - int(match.group(2)))
+                if start > end:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+
+            self.send_header(
+                "Content-Type",
+                mimetypes.guess_type(name)[0] or "application/octet-stream",
+            )
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self._cache_headers(etag)
+            self.end_headers()
+            if body:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+    def _cache_headers(self, etag):
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("ETag", etag)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("X-Content-Type-Options", "nosniff")
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def _ensure_server():
+    """Start the endpoint once per process; False if it is off or failed."""
+    global _server, _failed
+    if MEDIA_PORT == 0:
+        return False
+    with _lock:
+        if _server is not None or _failed:
+            return _server is not None
+        # Never wider than the app itself: --server.address 127.0.0.1
+        # keeps media on the loopback interface too
+        address = st.get_option("server.address") or ""
+        try:
+            _server = ThreadingHTTPServer((address, MEDIA_PORT), _MediaHandler)
+        except OSError as exc:
+            _failed = True
+            logger.warning(
+                "Media endpoint disabled, %s:%d unavailable (%s)",
+                address or "*", MEDIA_PORT, exc,
+            )
+            return False
+        _server.daemon_threads = True
+    threading.Thread(
+        target=_server.serve_forever, daemon=True, name="kmf-media"
+    ).start()
+    return True
+
+
+def _base_url():
+    if MEDIA_URL:
+        return MEDIA_URL.rstrip("/")
+    # Same host the browser reached the app on, on the media port
+    parts = urlsplit(st.context.url or "")
+    if parts.scheme == "https":
+        # A plain-HTTP endpoint would be blocked as mixed content
+        return None
+    return f"http://{parts.hostname or 'localhost'}:{MEDIA_PORT}"
+
+
+# --------------------------------------------------
+# Streamlit static serving
+# --------------------------------------------------
+def _static_folder():
+    return os.path.join(STATIC_MEDIA, MEDIA_VERSION)
+
+
+def _static_url(path, name):
+    """``/app/static/...`` for ``path``, linked in on first use; None if
+    static serving is off or the file cannot be linked."""
+    global _static_failed
+    if _static_failed or not st.get_option("server.enableStaticServing"):
+        return None
+    with _lock:
+        known = name in _published
+    if not known:
+        target = os.path.join(_static_folder(), name)
+        try:
+            os.makedirs(_static_folder(), exist_ok=True)
+            if not (os.path.exists(target) and os.path.samefile(path, target)):
+                # Link under a private name and rename over any stale link
+                tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.part"
+                os.link(path, tmp_path)
+                os.replace(tmp_path, target)
+        except OSError as exc:
+            # e.g. the data folder is on another file system
+            _static_failed = True
+            logger.warning("Static media disabled, cannot link %s (%s)", path, exc)
+            return None
+        with _lock:
+            _published.add(name)
+    return f"/app/static/media/{MEDIA_VERSION}/{name}"
+
+
+def sweep_static():
+    """Unlink published files whose original is gone (deleted, or evicted
+    from a derivative cache); returns how many were removed."""
+    removed = 0
+    try:
+        entries = list(os.scandir(_static_folder()))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            # A link is the file's only name once the original is removed
+            if entry.stat().st_nlink > 1:
+                continue
+            os.remove(entry.path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        with _lock:
+            _published.discard(entry.name)
+    return removed
+
+
+# --------------------------------------------------
+# Public URLs
+# --------------------------------------------------
+def media_url(path):
+    """A long-lived URL for a stored thumbnail or voice.
+
+    Falls back to ``path`` itself, served through Streamlit, when neither
+    the endpoint nor static serving is available or the file is not
+    content-addressed.
+    """
+    if path is None:
+        return None
+    name = os.path.basename(path)
+    if not _NAME.match(name):
+        return path
+    if not _ensure_server():
+        return _static_url(path, name) or path
+    base = _base_url()
+    if base is None:
+        return _static_url(path, name) or path
+
+    with _lock:
+        _files[name] = path
+    return f"{base}/{MEDIA_VERSION}/{name}"
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1024 * 1024
+
+# Files younger than this are never collected, so an upload that has been
+# stored but not yet saved to a member cannot be reclaimed under it.
+GC_GRACE_SECONDS = 600
+
+# Media fields on a member record
+MEDIA_FIELDS = ("image", "audio")
+
+
+# --------------------------------------------------
+# Content-addressed writes
+# --------------------------------------------------
+def _chunks(stream):
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _extension(filename):
+    return os.path.splitext(filename or "")[1].lower()
+
+
+def store_upload(upload, folder):
+    """Store an uploaded file under its SHA-256 and return the stored filename.
+
+    Identical content is written only once; the write goes to a temporary
+    file in the same folder and is atomically renamed into place.
+    """
+    os.makedirs(folder, exist_ok=True)
+    ext = _extension(getattr(upload, "name", ""))
+
+    if upload.seekable():
+        # Hash first so duplicate uploads cost no write I/O at all
+        upload.seek(0)
+        digest = hashlib.sha256()
+        for chunk in _chunks(upload):
+            digest.update(chunk)
+        filename = digest.hexdigest() + ext
+        if os.path.exists(os.path.join(folder, filename)):
+            return filename
+        upload.seek(0)
+
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in _chunks(upload):
+                digest.update(chunk)
+                f.write(chunk)
+        filename = digest.hexdigest() + ext
+        os.replace(tmp_path, os.path.join(folder, filename))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return filename
+
+
+@contextmanager
+def replacing(path):
+    """A private temp file beside ``path`` that replaces it once the block
+    completes, so concurrent writers of one file never share a temp file."""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", suffix=".part"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+# --------------------------------------------------
+# Reference counting and garbage collection
+# --------------------------------------------------
+def reference_counts(members, field):
+    return Counter(m[field] for m in members if m.get(field))
+
+
+def _remove_derivatives(household, field, filename):
+    # Imported here: the integrity check needs this module at startup, and
+    # the audio module brings NumPy with it
+    if field == "image":
+        from utils.thumbnails import remove_thumbnails
+
+        remove_thumbnails(household, filename)
+    else:
+        from utils.audio import remove_renditions
+
+        remove_renditions(household, filename)
+
+
+def release(household, field, filename, members):
+    """Remove a media file once no member references it any more."""
+    if not filename or reference_counts(members, field)[filename]:
+        return False
+    try:
+        os.remove(os.path.join(household.media_folder(field), filename))
+    except FileNotFoundError:
+        return False
+    _remove_derivatives(household, field, filename)
+    return True
+
+
+def collect_garbage(household, members):
+    """Delete the household's media files that no member uses.
+
+    Returns the number of bytes reclaimed.
+    """
+    reclaimed = 0
+    cutoff = time.time() - GC_GRACE_SECONDS
+
+    for field in MEDIA_FIELDS:
+        folder = household.media_folder(field)
+        if not os.path.isdir(folder):
+            continue
+        referenced = reference_counts(members, field)
+        for entry in os.scandir(folder):
+            if not entry.is_file() or entry.name.startswith("."):
+                continue
+            if entry.name in referenced:
+                continue
+            st = entry.stat()
+            if st.st_mtime > cutoff:
+                continue
+            os.remove(entry.path)
+            reclaimed += st.st_size
+            _remove_derivatives(household, field, entry.name)
+
+    # Imported here for the same reason; static links of derivatives
+    # removed (here or by cache eviction) are dropped too
+    from utils.media_server import sweep_static
+
+    sweep_static()
+    return reclaimed
@@ -0,0 +1,115 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from types import MappingProxyType
+
+# Members added through the setup form are saved at once and marked as
+# processing until their thumbnails, voice renditions and metadata exist.
+# Members without a status predate the upload queue and are ready.
+PROCESSING = "processing"
+READY = "ready"
+FAILED = "failed"
+
+
+def is_ready(member):
+    return member.get("status", READY) == READY
+
+
+def _freeze_value(value):
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType(dict(value))
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _freeze(member):
+    # Nested records (media metadata, family tree links) are frozen too
+    return MappingProxyType({k: _freeze_value(v) for k, v in member.items()})
+
+
+def _fold(text):
+    return (text or "").strip().casefold()
+
+
+# --------------------------------------------------
+# Immutable member store (one per household version)
+# --------------------------------------------------
+class MemberStore(Sequence):
+    """A household's members, frozen and shared by every session.
+
+    Members keep their display order; each has a stable integer ``id``,
+    so session state only needs to hold IDs. The indexes below are built
+    once per household version, so screens never scan the family.
+    """
+
+    def __init__(self, members=()):
+        self._members = tuple(_freeze(m) for m in members)
+        self._by_id = {m["id"]: m for m in self._members}
+        self.ids = tuple(self._by_id)
+
+        # Relationship (case-insensitive) -> members, in display order
+        by_relationship = {}
+        labels = {}
+        for m in self._members:
+            key = _fold(m.get("relationship"))
+            by_relationship.setdefault(key, []).append(m)
+            labels.setdefault(key, m.get("relationship"))
+        self._by_relationship = {k: tuple(v) for k, v in by_relationship.items()}
+        self.relationships = tuple(sorted(labels.values(), key=_fold))
+
+        # Folded names, sorted, for prefix searches by bisection
+        names = sorted(
+            (_fold(m.get("name")), pos) for pos, m in enumerate(self._members)
+        )
+        self._name_keys = [name for name, _ in names]
+        self._name_positions = [pos for _, pos in names]
+
+        self._ready = tuple(m for m in self._members if is_ready(m))
+        self._with_audio = tuple(
+            m for m in self._members if m.get("audio") and is_ready(m)
+        )
+        self._processing = tuple(
+            m for m in self._members if m.get("status") == PROCESSING
+        )
+
+    def __getitem__(self, index):
+        return self._members[index]
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def get(self, member_id, default=None):
+        return self._by_id.get(member_id, default)
+
+    def pick(self, member_ids):
+        """Members for ``member_ids`` in that order, skipping removed ones."""
+        by_id = self._by_id
+        return [by_id[i] for i in member_ids if i in by_id]
+
+    def by_relationship(self, relationship):
+        return self._by_relationship.get(_fold(relationship), ())
+
+    def with_prefix(self, prefix):
+        """Members whose name starts with ``prefix`` (any case), in order."""
+        prefix = _fold(prefix)
+        lo = bisect_left(self._name_keys, prefix)
+        hi = bisect_right(self._name_keys, prefix + "\U0010ffff", lo)
+        return tuple(self._members[pos] for pos in sorted(self._name_positions[lo:hi]))
+
+    def ready(self):
+        """Members whose photo (and voice, if any) are ready for the games."""
+        return self._ready
+
+    def with_audio(self):
+        """Members whose voice is ready to play."""
+        return self._with_audio
+
+    def processing(self):
+        """Members whose uploads are still being prepared."""
+        return self._processing
+
+
+EMPTY = MemberStore()
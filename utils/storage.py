@@ -0,0 +1,331 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from utils.households import OPEN_HOUSEHOLDS
+
+# "sqlite" (default) or "json"
+STORAGE_ENV = "KMF_STORAGE"
+
+# Member fields that hold other members' IDs (the family tree)
+LINK_FIELDS = ("parents", "spouses")
+
+
+def _unlinked(member, member_id):
+    """``member``'s changed link fields once ``member_id`` is gone."""
+    return {
+        field: [i for i in member[field] if i != member_id]
+        for field in LINK_FIELDS
+        if member_id in (member.get(field) or ())
+    }
+
+
+# --------------------------------------------------
+# JSON backend (legacy single-file format)
+# --------------------------------------------------
+class JsonBackend:
+    def __init__(self, path):
+        self.path = path
+        # The file stays a plain list of members; the next free ID is kept
+        # beside it, so IDs of deleted members are never handed out again
+        self.next_id_path = path + ".next_id"
+        # Background workers update members too; serialise read-modify-writes
+        self._lock = threading.RLock()
+
+    def close(self):
+        pass
+
+    def stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            members = json.load(f)
+        return _assign_ids(members, self._next_id(members))
+
+    def _next_id(self, members):
+        try:
+            with open(self.next_id_path, "r") as f:
+                stored = int(f.read())
+        except (FileNotFoundError, ValueError):
+            stored = 0
+        return max(stored, _next_id(members))
+
+    def _write(self, path, text):
+        # Write next to the target and rename, so a crash never leaves
+        # a half-written file behind
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def save_all(self, members):
+        with self._lock:
+            members = [dict(m) for m in members]
+            next_id = self._next_id(members)
+            members = _assign_ids(members, next_id)
+            # The high-water mark goes first: a crash in between skips an
+            # ID rather than reusing one
+            self._write(self.next_id_path, str(max(next_id, _next_id(members))))
+            self._write(self.path, json.dumps(members, indent=4, default=dict))
+
+    def add_member(self, member):
+        return self.add_members([member])[0]
+
+    def add_members(self, new_members):
+        """Append members in one write and return their new IDs."""
+        with self._lock:
+            members = self.load()
+            next_id = self._next_id(members)
+            ids = list(range(next_id, next_id + len(new_members)))
+            members += [dict(m, id=i) for m, i in zip(new_members, ids)]
+            self.save_all(members)
+        return ids
+
+    def delete_member(self, member_id):
+        # Links to the member go with it, in the same write
+        with self._lock:
+            members = [m for m in self.load() if m["id"] != member_id]
+            for m in members:
+                m.update(_unlinked(m, member_id))
+            self.save_all(members)
+
+    def update_members(self, updates):
+        with self._lock:
+            members = self.load()
+            for m in members:
+                if m["id"] in updates:
+                    m.update(updates[m["id"]])
+            self.save_all(members)
+
+
+def _next_id(members):
+    return max((m["id"] for m in members if "id" in m), default=0) + 1
+
+
+def _assign_ids(members, next_id):
+    # Records from before members had IDs are numbered in file order; the
+    # numbers are written back with the next save
+    for m in members:
+        if "id" not in m:
+            m["id"] = next_id
+            next_id += 1
+    return members
+
+
+# --------------------------------------------------
+# SQLite backend (one row per member, WAL mode)
+# --------------------------------------------------
+class SqliteBackend:
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._conn = None
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._transaction() as cur:
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS members ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " data TEXT NOT NULL)"
+            )
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL)"
+            )
+            cur.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('version', '0')"
+            )
+            self._migrate_json(cur, legacy_json)
+
+    # ---------- connection ----------
+    def _db(self):
+        # Callers hold _lock. Opened on first use, and again after close(),
+        # so a caller still holding an evicted backend keeps working
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False,
+                isolation_level=None,
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------- transactions ----------
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            cur = self._db().cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+                cur.execute(
+                    "UPDATE meta SET value = CAST(value AS INTEGER) + 1"
+                    " WHERE key = 'version'"
+                )
+                cur.execute("COMMIT")
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+
+    def _migrate_json(self, cur, legacy_json):
+        done = cur.execute(
+            "SELECT 1 FROM meta WHERE key = 'migrated_json'"
+        ).fetchone()
+        if done:
+            return
+        if legacy_json and os.path.exists(legacy_json):
+            with open(legacy_json, "r") as f:
+                members = json.load(f)
+            if not cur.execute("SELECT 1 FROM members LIMIT 1").fetchone():
+                self._insert(cur, members)
+        cur.execute(
+            "INSERT INTO meta (key, value) VALUES ('migrated_json', '1')"
+        )
+
+    # ---------- reads ----------
+    def stamp(self):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT value FROM meta WHERE key = 'version'"
+            ).fetchone()
+        return row[0]
+
+    def load(self):
+        # The row id is the member's stable ID (AUTOINCREMENT never reuses one)
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT id, data FROM members ORDER BY id"
+            ).fetchall()
+        return [dict(json.loads(data), id=row_id) for row_id, data in rows]
+
+    # ---------- writes ----------
+    @staticmethod
+    def _data(member):
+        return json.dumps(
+            {k: v for k, v in member.items() if k != "id"}, default=dict
+        )
+
+    def _insert(self, cur, members):
+        # Members that already have an ID keep it
+        cur.executemany(
+            "INSERT INTO members (id, data) VALUES (?, ?)",
+            [(m["id"], self._data(m)) for m in members if "id" in m],
+        )
+        cur.executemany(
+            "INSERT INTO members (data) VALUES (?)",
+            [(self._data(m),) for m in members if "id" not in m],
+        )
+
+    def save_all(self, members):
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM members")
+            self._insert(cur, members)
+
+    def add_member(self, member):
+        return self.add_members([member])[0]
+
+    def add_members(self, members):
+        """Insert members in one transaction and return their new IDs."""
+        ids = []
+        with self._transaction() as cur:
+            for member in members:
+                cur.execute(
+                    "INSERT INTO members (data) VALUES (?)", (self._data(member),)
+                )
+                ids.append(cur.lastrowid)
+        return ids
+
+    def update_members(self, updates):
+        # Merge fields into existing members; removed members are skipped
+        with self._transaction() as cur:
+            for member_id, fields in updates.items():
+                row = cur.execute(
+                    "SELECT data FROM members WHERE id = ?", (member_id,)
+                ).fetchone()
+                if row:
+                    cur.execute(
+                        "UPDATE members SET data = ? WHERE id = ?",
+                        (self._data(dict(json.loads(row[0]), **fields)), member_id),
+                    )
+
+    def delete_member(self, member_id):
+        # Links to the member go with it, in the same transaction
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM members WHERE id = ?", (member_id,))
+            linked = cur.execute(
+                "SELECT id, data FROM members WHERE EXISTS ("
+                + " UNION ALL ".join(
+                    f"SELECT 1 FROM json_each(data, '$.{field}') WHERE value = ?"
+                    for field in LINK_FIELDS
+                )
+                + ")",
+                (member_id,) * len(LINK_FIELDS),
+            ).fetchall()
+            for row_id, data in linked:
+                member = json.loads(data)
+                member.update(_unlinked(member, member_id))
+                cur.execute(
+                    "UPDATE members SET data = ? WHERE id = ?",
+                    (self._data(member), row_id),
+                )
+
+
+# --------------------------------------------------
+# Backend selection
+# --------------------------------------------------
+# Only the most recently used households keep their database open, so a
+# server hosting thousands of households stays within its file limit
+_backends = OrderedDict()
+_backends_lock = threading.Lock()
+_close_listeners = []
+
+
+def on_close(listener):
+    """Call ``listener(backend)`` whenever an idle backend is closed."""
+    _close_listeners.append(listener)
+
+
+def get_backend(household, kind=None):
+    kind = kind or os.environ.get(STORAGE_ENV, "sqlite")
+    key = (kind, household.root)
+    evicted = []
+    with _backends_lock:
+        if key in _backends:
+            _backends.move_to_end(key)
+            return _backends[key]
+        if kind == "sqlite":
+            backend = SqliteBackend(
+                household.db_file, legacy_json=household.data_file
+            )
+        elif kind == "json":
+            backend = JsonBackend(household.data_file)
+        else:
+            raise ValueError(f"Unknown storage backend: {kind}")
+        _backends[key] = backend
+        while len(_backends) > OPEN_HOUSEHOLDS:
+            evicted.append(_backends.popitem(last=False)[1])
+
+    for old in evicted:
+        old.close()
+        for listener in _close_listeners:
+            listener(old)
+    return backend
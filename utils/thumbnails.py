@@ -0,0 +1,174 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# PIL is imported only where photos are decoded, so serving thumbnails
+# that already exist never loads it
+
+# Every width the screens display a photo at
+DISPLAY_SIZES = (45, 120, 140, 150, 160)
+
+# Derivatives are rendered at 2x so they stay sharp on high-DPI screens
+SCALE = 2
+JPEG_QUALITY = 80
+
+# Upper bound for each household's derivative cache on disk
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+# --------------------------------------------------
+# LRU bookkeeping (one per thumbnail folder)
+# --------------------------------------------------
+class _DerivativeCache:
+    def __init__(self, folder):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.lru = OrderedDict()
+        self.total_bytes = 0
+
+        if not os.path.isdir(folder):
+            return
+        entries = []
+        for entry in os.scandir(folder):
+            if entry.is_file():
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.path, st.st_size))
+        for _, path, size in sorted(entries):
+            self.lru[path] = size
+            self.total_bytes += size
+
+    def touch(self, path, size):
+        with self.lock:
+            self.total_bytes += size - self.lru.get(path, 0)
+            self.lru[path] = size
+            self.lru.move_to_end(path)
+
+            while self.total_bytes > MAX_CACHE_BYTES and len(self.lru) > 1:
+                old_path, old_size = self.lru.popitem(last=False)
+                self.total_bytes -= old_size
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+
+    def hit(self, path):
+        """Mark a known derivative as used; False if this process has not seen it."""
+        with self.lock:
+            if path not in self.lru:
+                return False
+            self.lru.move_to_end(path)
+            return True
+
+    def discard(self, path):
+        with self.lock:
+            self.total_bytes -= self.lru.pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+_caches_lock = threading.Lock()
+_caches = {}
+
+
+def _cache_for(household):
+    with _caches_lock:
+        cache = _caches.get(household.thumb_folder)
+        if cache is None:
+            cache = _caches[household.thumb_folder] = _DerivativeCache(
+                household.thumb_folder
+            )
+        return cache
+
+
+def _derivative_path(household, image_name, width):
+    return os.path.join(household.thumb_folder, f"{image_name}.{width}.jpg")
+
+
+# --------------------------------------------------
+# Generate derivatives
+# --------------------------------------------------
+def _render(cache, img, width, out_path):
+    from PIL import Image
+
+    target_w = width * SCALE
+    if img.width > target_w:
+        target_h = max(1, round(img.height * target_w / img.width))
+        img = img.resize((target_w, target_h), Image.LANCZOS)
+
+    # A private temp file per writer: two sessions (or a session and the
+    # upload queue) may render the same missing derivative at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    cache.touch(out_path, os.path.getsize(out_path))
+
+
+def _open_source(image_path, width):
+    from PIL import Image, ImageOps
+
+    img = Image.open(image_path)
+    # Let the JPEG decoder downscale while decoding
+    img.draft("RGB", (width * SCALE, width * SCALE))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        background = Image.new("RGB", img.size, "white")
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background.paste(img, mask=img.split()[-1])
+        else:
+            background.paste(img.convert("RGB"))
+        img = background
+    return img
+
+
+def create_thumbnails(household, image_name, sizes=DISPLAY_SIZES):
+    os.makedirs(household.thumb_folder, exist_ok=True)
+    cache = _cache_for(household)
+    img = _open_source(
+        os.path.join(household.image_folder, image_name), max(sizes)
+    )
+    for width in sorted(sizes, reverse=True):
+        _render(cache, img, width, _derivative_path(household, image_name, width))
+
+
+# --------------------------------------------------
+# Serve a derivative (regenerated lazily if missing)
+# --------------------------------------------------
+def thumbnail_path(household, image_name, width):
+    cache = _cache_for(household)
+    out_path = _derivative_path(household, image_name, width)
+
+    # Known derivatives are served from memory, without a stat
+    if cache.hit(out_path):
+        return out_path
+
+    try:
+        cache.touch(out_path, os.path.getsize(out_path))
+        return out_path
+    except FileNotFoundError:
+        pass
+
+    image_path = os.path.join(household.image_folder, image_name)
+    if not os.path.exists(image_path):
+        return None
+
+    os.makedirs(household.thumb_folder, exist_ok=True)
+    _render(cache, _open_source(image_path, width), width, out_path)
+    return out_path
+
+
+# --------------------------------------------------
+# Drop derivatives of a deleted photo
+# --------------------------------------------------
+def remove_thumbnails(household, image_name, sizes=DISPLAY_SIZES):
+    cache = _cache_for(household)
+    for width in sizes:
+        cache.discard(_derivative_path(household, image_name, width))
@@ -0,0 +1,85 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.audio import ingest_audio
+from utils.family_repository import update_members
+from utils.media_meta import media_metadata
+from utils.member_store import FAILED, PROCESSING, READY
+from utils.thumbnails import create_thumbnails
+
+# Uploads processed at the same time, across all households
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+_pending = {}   # (household root, member id) -> Future
+
+
+def _pool():
+    # Callers hold _lock
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MAX_WORKERS, thread_name_prefix="kmf-upload"
+        )
+    return _executor
+
+
+# --------------------------------------------------
+# One job: everything an added member needs before the games use it
+# --------------------------------------------------
+def _process(household, member_id, image, audio):
+    """Render thumbnails, voice renditions and metadata, then mark the
+    member ready. Every step overwrites its own output, so a job that was
+    interrupted can simply run again."""
+    try:
+        create_thumbnails(household, image)
+        if audio:
+            # An undecodable voice is still served as uploaded
+            ingest_audio(household, audio)
+        fields = media_metadata(household, {"image": image, "audio": audio})
+        fields["status"] = READY
+    except Exception:
+        logger.warning("Could not process uploads of member %s", member_id, exc_info=True)
+        fields = {"status": FAILED}
+    # A member deleted in the meantime is skipped by the store
+    update_members({member_id: fields}, household)
+
+
+def _done(key, future):
+    with _lock:
+        _pending.pop(key, None)
+    if future.exception() is not None:
+        logger.error("Upload job %s failed", key, exc_info=future.exception())
+
+
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+def submit(household, member):
+    """Queue a saved member's uploads; a member already queued is skipped."""
+    key = (household.root, member["id"])
+    with _lock:
+        if key in _pending:
+            return
+        future = _pending[key] = _pool().submit(
+            _process, household, member["id"], member["image"], member.get("audio")
+        )
+    future.add_done_callback(lambda f: _done(key, f))
+
+
+def resume(household, family):
+    """Re-queue members left processing, e.g. by a restart mid-upload."""
+    for member in family:
+        if member.get("status") == PROCESSING:
+            submit(household, member)
+
+
+def pending(household):
+    """Number of this household's members still queued or in progress."""
+    with _lock:
+        return sum(1 for root, _ in _pending if root == household.root)
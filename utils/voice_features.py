@@ -0,0 +1,208 @@
+import threading
+
+import numpy as np
+
+from utils.audio import _decode, _resample, normalize_loudness, trim_silence
+
+# Voices are analysed at telephone-ish bandwidth; plenty to tell them apart
+ANALYSIS_RATE = 16000
+MAX_SECONDS = 10.0
+
+FRAME = 400        # 25 ms
+HOP = 160          # 10 ms
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+
+# Speaking pitch range searched by the autocorrelation tracker
+MIN_PITCH_HZ = 60
+MAX_PITCH_HZ = 400
+VOICED_THRESHOLD = 0.3
+
+# 12 MFCC means (c0 is loudness), 12 MFCC spreads, pitch median and spread,
+# voiced fraction
+VOICEPRINT_SIZE = 2 * (N_MFCC - 1) + 3
+
+DIFFICULTIES = ("easy", "normal", "hard")
+
+# Rows per block when computing every member's neighbours at once
+TABLE_BLOCK = 256
+
+
+# --------------------------------------------------
+# Feature extraction
+# --------------------------------------------------
+def _mel_filterbank():
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mels = np.linspace(hz_to_mel(0), hz_to_mel(ANALYSIS_RATE / 2), N_MELS + 2)
+    bins = np.floor((N_FFT + 1) * mel_to_hz(mels) / ANALYSIS_RATE).astype(int)
+
+    bank = np.zeros((N_MELS, N_FFT // 2 + 1))
+    for m in range(1, N_MELS + 1):
+        left, centre, right = bins[m - 1], bins[m], bins[m + 1]
+        if centre > left:
+            bank[m - 1, left:centre] = np.linspace(0, 1, centre - left, endpoint=False)
+        if right > centre:
+            bank[m - 1, centre:right] = np.linspace(1, 0, right - centre, endpoint=False)
+    return bank
+
+
+def _dct_matrix():
+    n = np.arange(N_MELS)
+    k = np.arange(N_MFCC)[:, None]
+    return np.cos(np.pi * k * (2 * n + 1) / (2 * N_MELS))
+
+
+_MEL_BANK = _mel_filterbank()
+_DCT = _dct_matrix()
+_WINDOW = np.hamming(FRAME)
+
+
+def _frames(samples):
+    if len(samples) < FRAME:
+        samples = np.pad(samples, (0, FRAME - len(samples)))
+    n = 1 + (len(samples) - FRAME) // HOP
+    idx = np.arange(FRAME)[None, :] + HOP * np.arange(n)[:, None]
+    return samples[idx]
+
+
+def _mfcc(frames):
+    spectrum = np.abs(np.fft.rfft(frames * _WINDOW, N_FFT)) ** 2
+    mel = np.log(spectrum @ _MEL_BANK.T + 1e-10)
+    return mel @ _DCT.T
+
+
+def _pitch(frames):
+    """Per-frame pitch in Hz, 0 where the frame is unvoiced."""
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(frames, 2 * FRAME)
+    ac = np.fft.irfft(np.abs(spectrum) ** 2)[:, :FRAME]
+
+    lo = ANALYSIS_RATE // MAX_PITCH_HZ
+    hi = ANALYSIS_RATE // MIN_PITCH_HZ
+    lag = lo + np.argmax(ac[:, lo:hi], axis=1)
+    energy = ac[:, 0]
+    strength = np.divide(
+        ac[np.arange(len(ac)), lag], energy,
+        out=np.zeros_like(energy), where=energy > 0,
+    )
+    return np.where(strength >= VOICED_THRESHOLD, ANALYSIS_RATE / lag, 0.0)
+
+
+def voiceprint_from_samples(samples, sr):
+    """A compact, fixed-size description of how a voice sounds."""
+    samples = _resample(np.asarray(samples, dtype=np.float32), sr, ANALYSIS_RATE)
+    samples = normalize_loudness(trim_silence(samples, ANALYSIS_RATE))
+    samples = samples[: int(ANALYSIS_RATE * MAX_SECONDS)]
+    if len(samples) == 0:
+        return None
+
+    frames = _frames(samples)
+    mfcc = _mfcc(frames)[:, 1:]
+    pitch = _pitch(frames)
+    voiced = np.log(pitch[pitch > 0])
+    if len(voiced):
+        q25, median, q75 = np.percentile(voiced, (25, 50, 75))
+    else:
+        q25 = median = q75 = 0.0
+
+    vector = np.concatenate([
+        mfcc.mean(axis=0),
+        mfcc.std(axis=0),
+        [median, q75 - q25, len(voiced) / len(pitch)],
+    ])
+    return [round(float(v), 4) for v in vector]
+
+
+def voiceprint(path):
+    """Voiceprint of an audio file, or None when it cannot be decoded."""
+    try:
+        samples, sr = _decode(path)
+    except Exception:
+        return None
+    return voiceprint_from_samples(samples, sr)
+
+
+# --------------------------------------------------
+# Voice index (one per household version)
+# --------------------------------------------------
+class VoiceIndex:
+    """Voiceprints of a family's recorded members, for neighbour searches.
+
+    Every dimension is standardised across the family, so MFCC and pitch
+    statistics weigh in equally.
+    """
+
+    def __init__(self, family):
+        members = [
+            m for m in family
+            if m.get("audio") and (m.get("audio_meta") or {}).get("voiceprint")
+        ]
+        self.ids = np.array([m["id"] for m in members], dtype=np.int64)
+        self._row = {member_id: row for row, member_id in enumerate(self.ids.tolist())}
+
+        vectors = np.array(
+            [m["audio_meta"]["voiceprint"] for m in members], dtype=np.float64
+        ).reshape(len(members), VOICEPRINT_SIZE)
+        if len(members):
+            spread = vectors.std(axis=0)
+            spread[spread == 0] = 1.0
+            vectors = (vectors - vectors.mean(axis=0)) / spread
+        self._vectors = vectors
+        self._norms = np.einsum("ij,ij->i", vectors, vectors)
+        self._tables = {}
+
+    def __contains__(self, member_id):
+        return member_id in self._row
+
+    def neighbour_table(self, k, farthest=False):
+        """``{member id: (up to k other IDs, nearest first)}`` for every
+        indexed member, computed once per index."""
+        key = (k, farthest)
+        if key not in self._tables:
+            self._tables[key] = self._neighbour_table(k, farthest)
+        return self._tables[key]
+
+    def _neighbour_table(self, k, farthest):
+        n = len(self.ids)
+        k = min(k, n - 1)
+        if k <= 0:
+            return {}
+        table = {}
+        # Blocks of rows keep the distance matrix small for big families
+        for start in range(0, n, TABLE_BLOCK):
+            rows = np.arange(start, min(start + TABLE_BLOCK, n))
+            distances = (
+                self._norms[rows, None]
+                - 2 * self._vectors[rows] @ self._vectors.T
+                + self._norms[None, :]
+            )
+            if farthest:
+                distances = -distances
+            distances[np.arange(len(rows)), rows] = np.inf
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1)
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            table.update(zip(
+                self.ids[rows].tolist(), map(tuple, self.ids[nearest].tolist())
+            ))
+        return table
+
+
+_lock = threading.Lock()
+_indexes = {}   # household root -> (family, VoiceIndex)
+
+
+def voice_index(household, family):
+    """The household's voice index, rebuilt only when the family changes."""
+    with _lock:
+        cached = _indexes.get(household.root)
+        if cached is None or cached[0] is not family:
+            cached = _indexes[household.root] = (family, VoiceIndex(family))
+        return cached[1]
+